@@ -1,10 +1,38 @@
 import os
 import yaml
-from copy import copy
+from copy import copy, deepcopy
+from functools import lru_cache
 
 from manager.exceptions import ConfigError
 from manager.logger import Logger
 
+try:
+    # libyaml-based loader (considerably faster)
+    from yaml import CFullLoader as _YamlLoader
+except ImportError:
+    # pyyaml built without libyaml or older versions of pyyaml
+    _YamlLoader = getattr(yaml, 'FullLoader', None)
+
+
+@lru_cache(maxsize=64)
+def _load_yaml(config_file, mtime, size):
+    """Parse YAML config file.
+
+    Parsed files are cached (modification time and size are part of the
+    key, so modified files are parsed again).
+
+    :param str config_file: path to config file
+    :param int mtime: file modification time (ns)
+    :param int size: file size
+
+    :return dict: parsed configuration (shared, do not modify)
+    """
+    with open(config_file, 'r') as ymlfile:
+        if _YamlLoader is None:
+            # support also older versions of pyyaml
+            return yaml.load(ymlfile)
+        return yaml.load(ymlfile, Loader=_YamlLoader)
+
 
 class QCConfigParser:
     """Parse input configuration files (IF-MNG-PROCESS).
@@ -126,29 +154,28 @@ class QCConfigParser:
         # read configuration into dictionary
         # see https://martin-thoma.com/configuration-files-in-python/
         try:
-            with open(config_file, 'r') as ymlfile:
+            # parsed content is cached -> copy (config may be modified)
+            stat = os.stat(config_file)
+            cfg = deepcopy(
+                _load_yaml(config_file, stat.st_mtime_ns, stat.st_size)
+            )
+
+            if 'logging' in cfg:
+                # set logging level
                 try:
-                    cfg = yaml.load(ymlfile, Loader=yaml.FullLoader)
-                except AttributeError:
-                    # support also older versions of pyyaml
-                    cfg = yaml.load(ymlfile)
-
-                if 'logging' in cfg:
-                    # set logging level
-                    try:
-                        Logger.setLevel(cfg['logging']['level'])
-                    except KeyError:
-                        pass # keep default log level
-                # self._cfg.update(cfg)
-                for key in cfg.keys():
-                    if key in self._cfg:
-                        if isinstance(cfg[key], list):
-                            self._cfg[key] = cfg[key]
-                        else: # assuming dict
-                            for k, v in cfg[key].items():
-                                self._cfg[key][k] = v
-                    else:
-                        self._cfg[key] = copy(cfg[key])
+                    Logger.setLevel(cfg['logging']['level'])
+                except KeyError:
+                    pass # keep default log level
+            # self._cfg.update(cfg)
+            for key in cfg.keys():
+                if key in self._cfg:
+                    if isinstance(cfg[key], list):
+                        self._cfg[key] = cfg[key]
+                    else: # assuming dict
+                        for k, v in cfg[key].items():
+                            self._cfg[key][k] = v
+                else:
+                    self._cfg[key] = copy(cfg[key])
             Logger.debug("Config file '{}' processed".format(config_file))
         except Exception as e:
             raise ConfigError(config_file, e)
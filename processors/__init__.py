@@ -205,7 +205,7 @@ class QCProcessorBase(ABC):
         )
 
     @staticmethod
-    def tif2jpg(tif_file, jpeg2000=False):
+    def tif2jpg(tif_file, jpeg2000=False, src=None):
         """Convert GeoTIFF file to JPEG/JPEG2000.
 
         Note: GDAL doesn't allow to create JPEG/JPEG2000 directly, see
@@ -213,13 +213,15 @@ class QCProcessorBase(ABC):
 
         :param str tif_file: input GeoTIFF file
         :param jpeg2000: True to produce JPG2000 format
+        :param src: already opened GDAL dataset of tif_file or None
 
         :return str: output JPEG/JPEG2000 file
         """
         from osgeo import gdal
 
-        # read input
-        src = gdal.Open(tif_file)
+        # read input (if not opened yet)
+        if src is None:
+            src = gdal.Open(tif_file)
 
         # define output options
         kwargs = {}
@@ -9,6 +9,10 @@ from manager.logger import Logger
 
 
 class QCConnectSentinelDownload(QCConnectSentinel):
+    # own API client, switched to backup archive on failure (see
+    # download_file())
+    cache_api = False
+
     def download_file(self, uuid, output_dir):
         from sentinelsat.sentinel import SentinelAPIError, InvalidChecksumError
 
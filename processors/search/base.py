@@ -2,6 +2,7 @@ import os
 import datetime
 import copy
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from requests.exceptions import ConnectionError
 
 from processors import QCProcessorIPBase
@@ -22,6 +23,9 @@ class QCProcessorSearchBase(QCProcessorIPBase, ABC):
     """
     isMeasurementOf = "feasibilityControlMetric"
 
+    # number of concurrent product metadata requests
+    metadata_workers = 16
+
     def __init__(self, config, response):
         super(QCProcessorSearchBase, self).__init__(
             config, response
@@ -41,6 +45,25 @@ class QCProcessorSearchBase(QCProcessorIPBase, ABC):
         """
         pass
 
+    def get_products_data(self, products):
+        """Get full metadata for all found products.
+
+        Metadata requests are I/O bound, so they are performed
+        concurrently.
+
+        :param dict products: found IP products
+
+        :return list: product metadata (None when not available) in the
+                      same order as products
+        """
+        def _get_product_data(uuid):
+            if products[uuid] is None:
+                return None
+            return self.get_product_data(uuid, products[uuid])
+
+        with ThreadPoolExecutor(max_workers=self.metadata_workers) as executor:
+            return list(executor.map(_get_product_data, products))
+
     def connect(self):
         """Connect provider API.
 
@@ -151,13 +174,13 @@ class QCProcessorSearchBase(QCProcessorIPBase, ABC):
         collected_files = []
         i = 0
         count = len(products)
-        for uuid in products:
+        # get full metadata
+        products_data = self.get_products_data(products)
+        for uuid, odata in zip(products, products_data):
             i += 1
             Logger.info("Querying {} ({}/{})".format(uuid, i, count))
-            # get full metadata
-            if products[uuid] is None:
+            if odata is None:
                 continue
-            odata = self.get_product_data(uuid, products[uuid])
             csv_data.append(odata)
 
             # compare downloaded data with already stored
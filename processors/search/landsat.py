@@ -1,5 +1,7 @@
 import json
-from datetime import datetime
+import atexit
+from datetime import datetime, timedelta
+from xml.sax import ContentHandler
 
 from processors.search.base import QCProcessorSearchBase
 from processors.exceptions import ProcessorFailedError
@@ -8,11 +10,129 @@ from processors.landsat import QCProcessorLandsatMeta
 
 from manager.logger import Logger
 
+try:
+    from landsatxplore.api import API as LandsatAPI
+    from landsatxplore.exceptions import EarthExplorerError
+except ImportError:
+    # reported by QCProcessorSearchLandsat.check_dependency()
+    LandsatAPI = None
+    EarthExplorerError = Exception
+
+# Landsat-8 image quality -> number of bad scans
+_L8_IMAGE_QUALITY = {
+    9: 0,
+    8: 4,
+    7: 4,
+    6: 16,
+    5: 16,
+    4: 64,
+    3: 64,
+    2: 128,
+    1: 128,
+    0: 256, # (more than 33% of scene is bad)
+    -1: 'NA'
+}
+
+def _parse_date(value, sep='-'):
+    """Parse date string in year, month, day order (eg. %Y-%m-%d).
+
+    Faster replacement of datetime.strptime() for fixed formats.
+
+    :param str value: date string
+    :param str sep: separator
+
+    :return datetime: parsed date
+    """
+    year, month, day = value.split(sep)
+    return datetime(int(year), int(month), int(day))
+
+
+def _parse_doy_time(value):
+    """Parse day of year date-time string (%Y:%j:%H:%M:%S).
+
+    :param str value: date-time string
+
+    :return datetime: parsed date-time
+    """
+    year, doy, hour, minute, second = value.split(':')
+    return datetime(int(year), 1, 1, int(hour), int(minute), int(second)) + \
+        timedelta(days=int(doy) - 1)
+
+
+# USGS metadata field name -> LandsatMetadata attribute
+_L8_METADATA_FIELDS = {
+    'Start Time': 'start_time',
+    'Stop Time': 'stop_time',
+    'Date L-1 Generated': 'date_generated',
+    'WRS Path': 'wrs_path',
+    'WRS Row': 'wrs_row',
+    'Sensor Identifier': 'sensor_identifier',
+    'Image Quality': 'image_quality',
+    'Reflective Lines': 'reflective_lines',
+    'Geometric RMSE Model X': 'geometric_rmse_x',
+    'Geometric RMSE Model Y': 'geometric_rmse_y',
+    'Scene Cloud Cover': 'scene_cloud_cover',
+    'Data Type Level-1': 'data_type_level1',
+    # July 2020 - a change in the USGS metadata -> the typo with the
+    # initial space in the attribute key fixed
+    ' Processing Software Version': 'processing_software_version',
+    'Processing Software Version': 'processing_software_version',
+}
+
+
+class LandsatMetadata:
+    """USGS EarthExplorer metadata of a Landsat product.
+
+    Only fields used by the search processor are kept (see
+    _L8_METADATA_FIELDS), missing fields are None.
+    """
+    __slots__ = tuple(sorted(set(_L8_METADATA_FIELDS.values())))
+
+    def __init__(self):
+        for attr in self.__slots__:
+            setattr(self, attr, None)
+
+
+class LandsatMetadataHandler(ContentHandler):
+    """SAX handler collecting USGS EarthExplorer metadata fields.
+
+    Parsed fields are stored in LandsatMetadata object (None for empty
+    values).
+    """
+    def __init__(self):
+        super(LandsatMetadataHandler, self).__init__()
+        self.metadata = LandsatMetadata()
+        self._attr = None
+        self._value = None
+
+    def startElement(self, name, attrs):
+        if name == 'eemetadata:metadataField':
+            self._attr = _L8_METADATA_FIELDS.get(attrs.get('name'))
+        elif name == 'eemetadata:metadataValue' and self._attr is not None:
+            self._value = []
+
+    def characters(self, content):
+        if self._value is not None:
+            self._value.append(content)
+
+    def endElement(self, name):
+        if name == 'eemetadata:metadataValue' and self._value is not None:
+            setattr(self.metadata, self._attr, ''.join(self._value) or None)
+            self._value = None
+        elif name == 'eemetadata:metadataField':
+            self._attr = None
+
 
 class QCConnectLandsat:
+    # API clients shared by connectors (key: username, archive)
+    _api_cache = {}
+
     def __init__(self, username, password, archive, backup_archive):
         """Connect API.
 
+        API client is created (logged in) only once for given username
+        and re-used by subsequent connectors.
+
         Raise ProcessorFailedError on failure
 
         :param str username: username
@@ -20,8 +140,10 @@ class QCConnectLandsat:
         :param str archive: not used by Landsat implementation
         :param str backup_archive: not used by Landsat implementation
         """
-        from landsatxplore.api import API as LandsatAPI
-        from landsatxplore.exceptions import EarthExplorerError
+        key = (username, archive)
+        if key in self._api_cache:
+            self.api = self._api_cache[key]
+            return
 
         try:
             self.api = LandsatAPI(
@@ -41,13 +163,27 @@ class QCConnectLandsat:
                 set_status=False
             )
 
+        self._api_cache[key] = self.api
+        # shared client is logged out on exit
+        atexit.register(self._logout, self.api)
+
     def __del__(self):
         if not hasattr(self, "api"):
             return
+        if any(api is self.api for api in self._api_cache.values()):
+            # shared client, see __init__()
+            return
 
-        from landsatxplore.exceptions import EarthExplorerError
+        self._logout(self.api)
+
+    @staticmethod
+    def _logout(api):
+        """Logout API client.
+
+        :param api: API client
+        """
         try:
-            self.api.logout()
+            api.logout()
         except EarthExplorerError as e:
             Logger.error("Landsat server is down. {}".format(e))
 
@@ -56,11 +192,9 @@ class QCConnectLandsat:
 
         :return: result
         """
-        from landsatxplore.exceptions import EarthExplorerError
-
         kwargs['bbox'] = wkt2bbox(footprint, switch_axis=True)
         kwargs['max_results'] = 500
-        del kwargs['producttype'] # used only for testing
+        kwargs.pop('producttype', None) # used only for testing
         try:
             items = self.api.search(**kwargs)
         except EarthExplorerError as e:
@@ -71,24 +205,17 @@ class QCConnectLandsat:
                 set_status=False
             )
 
+        tiles = [str(tile) for tile in (self.filter_by_tiles or ())]
         dict_items = {}
         for item in items:
-            selected = False
-            if self.filter_by_tiles:
-                for tile in self.filter_by_tiles:
-                    if str(tile) in item['entityId']:
-                        selected = True
-                        break
-            else:
-                selected = True
-            if selected:
-                dict_items[item['entityId']] = item
+            eid = item['entityId']
+            if not tiles or any(tile in eid for tile in tiles):
                 # used tests only
-                dict_items[item['entityId']]['producttype'] = item['displayId'].split('_')[1]
-                dict_items[item['entityId']]['beginposition'] = \
-                    datetime.strptime(item['startTime'], '%Y-%m-%d')
+                item['producttype'] = item['displayId'].split('_')[1]
+                item['beginposition'] = _parse_date(item['startTime'])
+                dict_items[eid] = item
             else:
-                Logger.info("IP {} skipped by tile filter".format(item['entityId']))
+                Logger.info("IP {} skipped by tile filter".format(eid))
 
         return dict_items
 
@@ -108,148 +235,162 @@ class QCProcessorSearchLandsat(QCProcessorSearchBase, QCProcessorLandsatMeta):
     }
     identifier_key = 'title'
 
+    # HTTP session shared by metadata requests (see get_session())
+    _session = None
+
+    def __init__(self, config, response):
+        super(QCProcessorSearchLandsat, self).__init__(
+            config, response
+        )
+
+        # USGS metadata of queried products (key: product title)
+        self._landsat_metadata = {}
+
     def check_dependency(self):
-        from landsatxplore.api import API as LandsatAPI
+        if LandsatAPI is None:
+            raise ImportError("No module named 'landsatxplore'")
+        import requests
 
     def get_query_params(self):
         kwargs = self._get_query_params()
 
         # date must be converted to string
-        for item in ['start_date', 'end_date']:
-            kwargs[item] = kwargs[item].strftime("%Y-%m-%d")
+        kwargs['start_date'] = kwargs['start_date'].strftime("%Y-%m-%d")
+        kwargs['end_date'] = kwargs['end_date'].strftime("%Y-%m-%d")
         kwargs['producttype'] = 'L1TP' # used for testing
 
         Logger.debug("Query: {}".format(kwargs))
 
         return kwargs
 
-    def get_product_data(self, uuid, item):
-        import urllib
-        from xml.dom import minidom
+    @classmethod
+    def get_session(cls):
+        """Get HTTP session used for metadata requests.
 
-        url = item['metadataUrl']
-        response = urllib.request.urlopen(url)
-        html = response.read()
-        xml_meta = html.decode("utf-8")
+        Session is created on first call and re-used by subsequent calls
+        (keep-alive connections, gzip transfer encoding).
 
-        xmldoc = minidom.parseString(xml_meta)
-        itemlist = xmldoc.getElementsByTagName('eemetadata:metadataField')
-        # read metadata
-        self._landsat_metadata = {}
-        for s in itemlist:
-            fname = s.getAttribute("name")
-            metavalue = s.getElementsByTagName("eemetadata:metadataValue")[0]
-            try:
-                self._landsat_metadata[fname] = metavalue.firstChild.data
-            except AttributeError:
-                self._landsat_metadata[fname] = None
-
-        # convert L8 metadata fields to QCMMS metadata
-        odata = {}
-        odata['title'] = item['displayId']
-        odata['qcmms_data_href'] = item['downloadUrl']
-        odata['qcmms_previews_href'] = item['browseUrl']
-
-        odata['spatialFootprint'] = item['spatialFootprint']
-        odata['sceneBounds'] = item['sceneBounds']
-
-        # properties
-        odata['use_case'] = self.get_parent_identifier()
-        odata['Sensing start'] = datetime.strptime(
-            self._landsat_metadata['Start Time'].split('.')[0], '%Y:%j:%H:%M:%S'
-        )
-        odata['Sensing stop'] = datetime.strptime(
-            self._landsat_metadata['Stop Time'].split('.')[0], '%Y:%j:%H:%M:%S'
-        )
-        odata['Ingestion Date'] = datetime.strptime(
-            self._landsat_metadata['Date L-1 Generated'], "%Y/%m/%d"
-        )
+        :return requests.Session: HTTP session
+        """
+        if cls._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            cls._session = requests.Session()
+            cls._session.headers['Accept-Encoding'] = 'gzip'
+            # one keep-alive connection per metadata worker
+            cls._session.mount(
+                'https://', HTTPAdapter(pool_connections=cls.metadata_workers,
+                                        pool_maxsize=cls.metadata_workers)
+            )
 
-        # additional attributes
-        odata['Mission datatake id'] = item['entityId']
-        odata['id'] = item['entityId']
-        odata['NSSDC identifier'] = ''
-        odata['Tile Identifier horizontal order'] = \
-            (self._landsat_metadata['WRS Path']).strip() + \
-            (self._landsat_metadata['WRS Row']).strip()
-        odata['Datatake sensing start'] = datetime.strptime(
-            item['acquisitionDate'], '%Y-%m-%d'
-        )
-        # July 2020 - a change in the USGS metadata -> the typo with the
-        # initial space in the attribute key fixed
-        if ' Processing Software Version' in self._landsat_metadata.keys():
-            key = ' Processing Software Version'
-            odata['Processing baseline'] = self._landsat_metadata[key]
-        elif 'Processing Software Version' in self._landsat_metadata.keys():
-            key = 'Processing Software Version'
-            odata['Processing baseline'] = self._landsat_metadata[key]
-
-        # acquisition information
-        odata['Satellite name'] = self.config['image_products']['supplementary_platform']
-        odata['Satellite number'] = ''
-        odata['Instrument'] = self._landsat_metadata['Sensor Identifier']
-
-        # acquisition parameters
-        odata['Instrument mode'] = 'operational' # any other for Landsat?
-        # https://landsat.usgs.gov/landsat_acq
-        odata['Pass direction'] = 'DESCENDING'
-        odata['Orbit number (start)'] = int((self._landsat_metadata['WRS Path']).strip())
-        odata['Relative orbit (start)'] = int((self._landsat_metadata['WRS Path']).strip())
-        odata['Tile Identifier'] = \
-            (self._landsat_metadata['WRS Path']).strip() + \
-            (self._landsat_metadata['WRS Row']).strip()
-
-        # product information
-        odata['Product type'] = self.config['image_products']['supplementary_sensor']
-        # "referenceSystemIdentifier" : "epsg:4326" Datum, Ellipsoid
-        odata['Cloud cover percentage'] = float(self._landsat_metadata['Scene Cloud Cover'])
-        odata['Format'] = 'TIF'
-
-        # missing QI parameters
-        odata['Degraded MSI data percentage'] = 0
-        odata['Degraded ancillary data percentage'] = 0
+        return cls._session
+
+    def get_product_data(self, uuid, item):
+        import xml.sax
+
+        url = item['metadataUrl']
+        with self.get_session().get(url, stream=True, timeout=30) as response:
+            response.raise_for_status()
+            # decompress gzip-encoded content on the fly
+            response.raw.decode_content = True
+
+            # read metadata (stream parsed, no document tree is built)
+            handler = LandsatMetadataHandler()
+            xml.sax.parse(response.raw, handler)
+            metadata = handler.metadata
+
+        wrs_path = metadata.wrs_path.strip()
+        wrs_row = metadata.wrs_row.strip()
+        image_products = self.config['image_products']
+
+        # convert L8 metadata fields to QCMMS metadata (built at once,
+        # key order defines CSV columns)
+        odata = {
+            'title': item['displayId'],
+            'qcmms_data_href': item['downloadUrl'],
+            'qcmms_previews_href': item['browseUrl'],
+
+            'spatialFootprint': item['spatialFootprint'],
+            'sceneBounds': item['sceneBounds'],
+
+            # properties
+            'use_case': self.get_parent_identifier(),
+            'Sensing start': _parse_doy_time(
+                metadata.start_time.split('.')[0]
+            ),
+            'Sensing stop': _parse_doy_time(
+                metadata.stop_time.split('.')[0]
+            ),
+            'Ingestion Date': _parse_date(
+                metadata.date_generated, sep='/'
+            ),
+
+            # additional attributes
+            'Mission datatake id': item['entityId'],
+            'id': item['entityId'],
+            'NSSDC identifier': '',
+            'Tile Identifier horizontal order': wrs_path + wrs_row,
+            'Datatake sensing start': _parse_date(item['acquisitionDate']),
+            'Processing baseline': metadata.processing_software_version,
+
+            # acquisition information
+            'Satellite name': image_products['supplementary_platform'],
+            'Satellite number': '',
+            'Instrument': metadata.sensor_identifier,
+
+            # acquisition parameters
+            'Instrument mode': 'operational', # any other for Landsat?
+            # https://landsat.usgs.gov/landsat_acq
+            'Pass direction': 'DESCENDING',
+            'Orbit number (start)': int(wrs_path),
+            'Relative orbit (start)': int(wrs_path),
+            'Tile Identifier': wrs_path + wrs_row,
+
+            # product information
+            'Product type': image_products['supplementary_sensor'],
+            # "referenceSystemIdentifier" : "epsg:4326" Datum, Ellipsoid
+            'Cloud cover percentage': float(metadata.scene_cloud_cover),
+            'Format': 'TIF',
+
+            # missing QI parameters
+            'Degraded MSI data percentage': 0,
+            'Degraded ancillary data percentage': 0,
+        }
+        # keep metadata for get_response_data()
+        self._landsat_metadata[odata['title']] = metadata
 
         return odata
 
     def get_response_data(self, data, extra_data={}):
-        # number of bad scans
-        l8_image_quality = {
-            9: 0,
-            8: 4,
-            7: 4,
-            6: 16,
-            5: 16,
-            4: 64,
-            3: 64,
-            2: 128,
-            1: 128,
-            0: 256, # (more than 33% of scene is bad)
-            -1: 'NA'
-        }
-        bad_scans = l8_image_quality[int(self._landsat_metadata['Image Quality'])]
+        metadata = self._landsat_metadata[data['title']]
+        image_quality = int(metadata.image_quality)
+        rmse_x = metadata.geometric_rmse_x
+        rmse_y = metadata.geometric_rmse_y
+
+        bad_scans = _L8_IMAGE_QUALITY[image_quality]
         if bad_scans > 0:
             extra_data['qualityDegradation'] = \
-                (bad_scans / int(self._landsat_metadata['Reflective Lines'])) * 100
+                (bad_scans / int(metadata.reflective_lines)) * 100
         else:
             extra_data['qualityDegradation'] = -1.0
 
-        extra_data['geometry'] = json.loads(
-            '{{ "type": "Polygon", "coordinates": {0} }}'.format(
-                data['spatialFootprint']['coordinates']
-        ))
-        extra_data['bbox'] = [float(x) for x in data['sceneBounds'].split(',')]
+        extra_data['geometry'] = {
+            "type": "Polygon",
+            "coordinates": data['spatialFootprint']['coordinates']
+        }
+        extra_data['bbox'] = list(map(float, data['sceneBounds'].split(',')))
 
         extra_data['processingLevel'] = \
-            self._landsat_metadata['Data Type Level-1'].split('_')[-1]
+            metadata.data_type_level1.split('_')[-1]
         extra_data['size'] = -1
         
         extra_data['formatCorrectnessMetric'] = True
         extra_data['generalQualityMetric'] = True
         # quality information
-        if self._landsat_metadata['Geometric RMSE Model X'] and \
-           self._landsat_metadata['Geometric RMSE Model Y']:
-            geometric_RMSE_X = float(self._landsat_metadata['Geometric RMSE Model X'])
-            geometric_RMSE_Y = float(self._landsat_metadata['Geometric RMSE Model Y'])
+        if rmse_x and rmse_y:
+            geometric_RMSE_X = float(rmse_x)
+            geometric_RMSE_Y = float(rmse_y)
             geometric_resolution = self.config['land_product']['geometric_resolution']
             geometric_accuracy = self.config['land_product']['geometric_accuracy']
             geometric_thr = geometric_resolution * geometric_accuracy
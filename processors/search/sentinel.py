@@ -1,33 +1,54 @@
-import json
 from requests.exceptions import ConnectionError
-from collections import OrderedDict
 
 from processors.search.base import QCProcessorSearchBase
 from processors.exceptions import ProcessorFailedError
-from processors.utils import wkt2bbox, wkt2json
+from processors.utils import wkt2bbox_json
 from processors.sentinel import QCProcessorSentinelMeta
 
 from manager.logger import Logger
 from manager.io import datetime_format
 
+try:
+    from sentinelsat.sentinel import SentinelAPI, SentinelAPIError
+except ImportError:
+    # reported by QCProcessorSearchSentinel.check_dependency()
+    SentinelAPI = None
+    SentinelAPIError = Exception
+
+# Sentinel-2 quality indicators -> response quality metrics
+_S2_QUALITY_METRICS = (
+    ('Format correctness', 'formatCorrectnessMetric'),
+    ('General quality', 'generalQualityMetric'),
+    ('Geometric quality', 'geometricQualityMetric'),
+    ('Radiometric quality', 'radiometricQualityMetric'),
+    ('Sensor quality', 'sensorQualityMetric'),
+)
+
 
 class QCConnectSentinel:
+    # API clients shared by connectors (key: username, archive URL);
+    # cached clients must not be modified (see query())
+    _api_cache = {}
+    # share API clients via _api_cache
+    cache_api = True
+
     def __init__(self, username, password, archive, backup_archive=None):
         """Connect API.
 
+        API client is created only once for given username and archive
+        and re-used by subsequent connectors.
+
         Raise ProcessorFailedError on failure
         """
-        from sentinelsat.sentinel import SentinelAPI, SentinelAPIError
-
         # remember settings for query()
         self.archive = archive
         self.backup_archive = backup_archive
+        self._username = username
+        self._password = password
 
         # connect API
         try:
-            self.api = SentinelAPI(
-                username, password, archive
-            )
+            self.api = self._get_api(archive)
         except (SentinelAPIError, ConnectionError) as e:
             self.api = None
             if backup_archive:
@@ -36,9 +57,7 @@ class QCConnectSentinel:
                     archive, e, backup_archive
                 ))
                 try:
-                    self.api = SentinelAPI(
-                        username, password, backup_archive
-                    )
+                    self.api = self._get_api(backup_archive)
                 except (SentinelAPIError, ConnectionError) as e:
                     self.api = None
 
@@ -51,6 +70,27 @@ class QCConnectSentinel:
 
         Logger.debug("Sentinel API connected")
 
+    def _get_api(self, archive):
+        """Get API client for given archive.
+
+        Cached client is re-used if enabled by cache_api.
+
+        :param str archive: archive URL
+
+        :return SentinelAPI: API client
+        """
+        key = (self._username, archive)
+        if self.cache_api and key in self._api_cache:
+            Logger.debug("Sentinel API re-used")
+            return self._api_cache[key]
+
+        api = SentinelAPI(
+            self._username, self._password, archive
+        )
+        if self.cache_api:
+            self._api_cache[key] = api
+
+        return api
 
     def query(self, footprint, kwargs):
         """Query API.
@@ -59,21 +99,20 @@ class QCConnectSentinel:
 
         :return: result
         """
-        from sentinelsat.sentinel import SentinelAPIError
-
         result = None
         try:
             result = self.api.query(footprint, **kwargs)
         except (SentinelAPIError, ConnectionError) as e:
             if self.backup_archive:
-                # re-try with backup archive
+                # re-try with backup archive (own client, shared client
+                # of primary archive is kept untouched)
                 Logger.error("Unable to access {}. Re-trying with {}...".format(
                     self.archive, self.backup_archive
                 ))
-                self.api.api_url = self.backup_archive
-
                 try:
-                    result = self.api.query(footprint, **kwargs)
+                    result = self._get_api(self.backup_archive).query(
+                        footprint, **kwargs
+                    )
                 except (SentinelAPIError, ConnectionError) as e:
                     pass # exception will be raised anyway
 
@@ -84,13 +123,12 @@ class QCConnectSentinel:
             )
 
         if kwargs['producttype'] == 'S2MSI1C' and self.filter_by_tiles:
-            result_filtered = OrderedDict()
+            tiles = set(self.filter_by_tiles)
+            result_filtered = {}
             for ip, items in result.items():
-                for tile in self.filter_by_tiles:
-                    if tile == items['tileid']:
-                        result_filtered[ip] = items
-                        break
-                if ip not in result_filtered.keys():
+                if items['tileid'] in tiles:
+                    result_filtered[ip] = items
+                else:
                     Logger.info("IP {} skipped by tile filter".format(ip))
             return result_filtered
 
@@ -112,7 +150,8 @@ class QCProcessorSearchSentinel(QCProcessorSearchBase, QCProcessorSentinelMeta):
     identifier_key = 'title'
 
     def check_dependency(self):
-        from sentinelsat.sentinel import SentinelAPI
+        if SentinelAPI is None:
+            raise ImportError("No module named 'sentinelsat'")
 
     def get_query_params(self):
         """Get query.
@@ -141,31 +180,27 @@ class QCProcessorSearchSentinel(QCProcessorSearchBase, QCProcessorSentinelMeta):
     def get_response_data(self, data, extra_data={}):
         # select for delivery control?
         qi_failed = []
-        for attr in ('Format correctness',
-                     'General quality',
-                     'Geometric quality',
-                     'Radiometric quality',
-                     'Sensor quality'):
-            if data[attr] != 'PASSED':
+        for attr, metric in _S2_QUALITY_METRICS:
+            passed = data[attr] == 'PASSED'
+            extra_data[metric] = passed
+            if not passed:
                 qi_failed.append(attr)
-        selected_for_delivery_control = len(qi_failed) < 1
+        selected_for_delivery_control = not qi_failed
         if qi_failed:
             # log reason why it's failing
             Logger.info("Rejected because of {}".format(','.join(qi_failed)))
 
-        extra_data['bbox'] = wkt2bbox(data['footprint'])
-        extra_data['geometry'] = json.loads(wkt2json(data['footprint']))
+        bbox, geometry = wkt2bbox_json(data['footprint'])
+        extra_data['bbox'] = bbox
+        extra_data['geometry'] = geometry
         extra_data['qualityDegradation'] = max(
             float(data['Degraded MSI data percentage']),
             float(data['Degraded ancillary data percentage'])
         )
-        extra_data['processingLevel'] = data['Processing level'].split('-')[1]
-        extra_data['size'] = int(float(data['Size'].split(' ')[0]) * 1000)
-        extra_data['formatCorrectnessMetric'] = data['Format correctness'] == 'PASSED'
-        extra_data['generalQualityMetric'] = data['General quality'] == 'PASSED'
-        extra_data['geometricQualityMetric'] = data['Geometric quality'] == 'PASSED'
-        extra_data['radiometricQualityMetric'] = data['Radiometric quality'] == 'PASSED'
-        extra_data['sensorQualityMetric'] = data['Sensor quality'] == 'PASSED'
+        # eg. 'Level-1C' -> '1C'
+        extra_data['processingLevel'] = data['Processing level'].partition('-')[2]
+        # eg. '800.5 MB' -> 800500
+        extra_data['size'] = int(float(data['Size'].partition(' ')[0]) * 1000)
 
         return selected_for_delivery_control, \
             super(QCProcessorSearchSentinel, self).get_response_data(
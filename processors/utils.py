@@ -1,4 +1,36 @@
+import json
+
 from osgeo import ogr
+from shapely import wkt as shapely_wkt
+from shapely.geometry import mapping
+
+
+def _bounds2bbox(bounds, switch_axis=False):
+    """Convert geometry bounds to bbox.
+
+    :param tuple bounds: bounds (minX, minY, maxX, maxY)
+    :param bool switch_axis: switch axis (loglat -> latlog)
+
+    :return list: bbox
+    """
+    minx, miny, maxx, maxy = bounds
+    if switch_axis:
+        return [miny, minx, maxy, maxx]
+
+    return [minx, miny, maxx, maxy]
+
+
+def _coords2list(coords):
+    """Convert nested coordinate tuples to lists.
+
+    :param tuple coords: coordinates
+
+    :return list: coordinates
+    """
+    if isinstance(coords, (tuple, list)):
+        return [_coords2list(c) for c in coords]
+
+    return coords
 
 
 def gml2json(gml):
@@ -19,8 +51,7 @@ def wkt2json(wkt):
 
     :return str: JSON geometry
     """
-    geom = ogr.CreateGeometryFromWkt(wkt)
-    return geom.ExportToJson()
+    return json.dumps(mapping(shapely_wkt.loads(wkt)))
 
 
 def gml2bbox(gml):
@@ -31,8 +62,7 @@ def gml2bbox(gml):
     :return list: bbox
     """
     geom = ogr.CreateGeometryFromGML(gml)
-    # return list(geom.GetEnvelope())
-    
+
     # get Envelope returns a tuple (minX, maxX, minY, maxY)
     # but it doesn't seems to be like that (GDAL 2.4)
     evp = geom.GetEnvelope()
@@ -47,12 +77,20 @@ def wkt2bbox(wkt, switch_axis=False):
 
     :return list: bbox
     """
-    geom = ogr.CreateGeometryFromWkt(wkt)
-    
-    # get Envelope returns a tuple (minX, maxX, minY, maxY)
-    # but it doesn't seems to be like that (GDAL 2.4)
-    evp = geom.GetEnvelope()
-    if switch_axis:
-            return [evp[2], evp[0], evp[3], evp[1]]
+    return _bounds2bbox(shapely_wkt.loads(wkt).bounds, switch_axis)
+
+
+def wkt2bbox_json(wkt, switch_axis=False):
+    """Convert WKT geometry to bbox and GeoJSON.
+
+    :param str wkt: WKT string
+    :param bool switch_axis: switch axis (loglat -> latlog)
+
+    :return tuple: bbox (list), GeoJSON geometry (dict)
+    """
+    geom = shapely_wkt.loads(wkt)
+    # coordinates as lists (JSON arrays), no JSON round trip
+    geometry = mapping(geom)
+    geometry['coordinates'] = _coords2list(geometry['coordinates'])
 
-    return [evp[0], evp[2], evp[1], evp[3]]
+    return _bounds2bbox(geom.bounds, switch_axis), geometry
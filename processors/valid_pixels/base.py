@@ -1,20 +1,43 @@
 import os
+import re
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from abc import ABC, abstractmethod
+from abc import ABC
 
 from manager.logger import Logger
 
 from styles import StyleReader
 
 from processors import QCProcessorIPBase
-from processors.exceptions import ProccessorDependencyError, ProcessorFailedError
+from processors.exceptions import ProcessorFailedError
 
-try:
+# per-thread scratch buffers (see _get_scratch())
+_scratch = threading.local()
+
+
+def _get_scratch(shape):
+    """Get boolean scratch buffer of the current thread.
+
+    Buffer is allocated on first use (or when a larger one is needed)
+    and re-used by subsequent blocks and IPs.
+
+    :param tuple shape: requested shape (rows, cols)
+
+    :return array: buffer view of the requested shape
+    """
     import numpy as np
-    from osgeo import gdal, gdalconst, gdal_array
-    gdal.UseExceptions()
-except ImportError as e:
-    raise ProccessorDependencyError(self, e)
+
+    buf = getattr(_scratch, 'buf', None)
+    if buf is None or buf.shape[0] < shape[0] or buf.shape[1] < shape[1]:
+        if buf is not None:
+            shape_ = (max(buf.shape[0], shape[0]), max(buf.shape[1], shape[1]))
+        else:
+            shape_ = shape
+        buf = _scratch.buf = np.empty(shape_, dtype=np.bool_)
+
+    return buf[:shape[0], :shape[1]]
 
 
 class QCProcessorValidPixelsBase(QCProcessorIPBase, ABC):
@@ -26,11 +49,30 @@ class QCProcessorValidPixelsBase(QCProcessorIPBase, ABC):
     isMeasurementOf = "detailedControlMetric"
     isMeasurementOfSection = 'validPixels'
 
+    # L2 -> L2H data directory replacement (see get_lh_dir())
+    lh_dir_replace = None
+
+    # size of raster blocks (in pixels) processed at once
+    block_size = 1024
+    # number of threads computing vpx blocks
+    vpx_workers = os.cpu_count() or 1
+    # GeoTIFF creation options of vpx raster (0/1 values packed to 1 bit
+    # per pixel, predictor is not supported for 1-bit samples, blocks
+    # outside of the IP footprint (all zeros) are not written, see
+    # QCProcessorVpxCoverage.count_vpx())
+    creation_options = [
+        'TILED=YES', 'BLOCKXSIZE=512', 'BLOCKYSIZE=512', 'NBITS=1',
+        'COMPRESS=DEFLATE', 'NUM_THREADS=ALL_CPUS', 'SPARSE_OK=TRUE'
+    ]
+
     def __init__(self, config, response):
         super(QCProcessorValidPixelsBase, self).__init__(
             config, response
         )
 
+        # directory listings (see _find_files())
+        self._file_index = {}
+
         # results
         # -> self._result['qi.files']['output']
         self.add_qi_result(
@@ -38,20 +80,27 @@ class QCProcessorValidPixelsBase(QCProcessorIPBase, ABC):
             '{}m.tif'.format(self.config['land_product']['geometric_resolution'])
         )
 
-    @staticmethod
-    @abstractmethod
-    def get_lh_dir(data_dir):
+    @classmethod
+    def get_lh_dir(cls, data_dir):
         """Get data directory with L2 changed to L2H.
 
+        Platform-specific replacement is defined by lh_dir_replace, data
+        directory suffix (eg. .SAFE) is removed.
+
         :param data_dir: Path to data directory
 
         :return str: directory name
         """
-        pass
+        lh_dir = data_dir.replace(*cls.lh_dir_replace)
+        if cls.data_dir_suf and lh_dir.endswith(cls.data_dir_suf):
+            lh_dir = lh_dir[:-len(cls.data_dir_suf)]
+
+        return lh_dir
 
     def check_dependency(self):
         """Check processors software dependencies.
         """
+        import numpy
         from osgeo import gdal
 
     def _run(self, meta_data, data_dir, output_dir):
@@ -71,6 +120,9 @@ class QCProcessorValidPixelsBase(QCProcessorIPBase, ABC):
             ]
         }
 
+        # new IP, drop directory listings of previous one
+        self._file_index = {}
+
         # get the arosics input for fmask
         try:
             mask_raster = self._get_arosics_raster(output_dir)
@@ -81,19 +133,17 @@ class QCProcessorValidPixelsBase(QCProcessorIPBase, ABC):
         Logger.info("Running vpx for {} (mask: {})".format(data_dir, mask_raster))
         output = self._result['qi.files']['output']
         try:
-            self._run_vpx(mask_raster, output)
+            # GeoTiff mask + JPG mask
+            output_jpg, valid_pct = self._run_vpx(mask_raster, output, jpg=True)
         except ProcessorFailedError:
             return response_data
 
-        # GeoTiff mask -> JPG mask
-        output_jpg = self.tif2jpg(output)
-
         Logger.info("Output from valid pixels: {}".format(output_jpg))
 
         # additional response attributes
         response_data[self.isMeasurementOfSection][0].update(
             {
-                'validPct': self._compute_stats(output),
+                'validPct': valid_pct,
                 'mask': self.file_basename(output_jpg),
                 'rasterCoding': self.config['pixel_metadata_coding'][self.identifier],
                 'lineage': self.get_lineage()
@@ -102,15 +152,23 @@ class QCProcessorValidPixelsBase(QCProcessorIPBase, ABC):
 
         return response_data
 
-    def _run_vpx(self, input_file, output, inverse_mask=False):
+    def _run_vpx(self, input_file, output, inverse_mask=False, jpg=False):
         """Run valid pixels computation.
 
+        Raster is processed by blocks (see block_size).
+
         Raise ProcessorFailedError on failure.
 
         :param str input_file: input raster file
         :param str output: output raster file
         :param bool inverse_mask: use inverse mask?
+        :param bool jpg: also convert output to JPG
+
+        :return tuple: output JPG file or None, valid pixels percentage
         """
+        from osgeo import gdal, gdalconst
+        gdal.UseExceptions()
+
         try:
             # open input data
             ids = gdal.Open(input_file, gdalconst.GA_ReadOnly)
@@ -118,58 +176,101 @@ class QCProcessorValidPixelsBase(QCProcessorIPBase, ABC):
             itrans = ids.GetGeoTransform()
             fmask_band = ids.GetRasterBand(1)
             # ct = band_ref.GetRasterColorTable()
+            xsize = fmask_band.XSize
+            ysize = fmask_band.YSize
 
             # open output data
             driver = gdal.GetDriverByName('GTiff')
             ods = driver.Create(output,
-                                fmask_band.XSize, fmask_band.YSize,
-                                eType=fmask_band.DataType)
+                                xsize, ysize,
+                                eType=gdal.GDT_Byte,
+                                options=self.creation_options)
             ods.SetGeoTransform(itrans)
             ods.SetProjection(iproj)
+            vpx_band = ods.GetRasterBand(1)
 
-            # create vpx
-            dtype = gdal_array.GDALTypeCodeToNumericTypeCode(
-                ids.GetRasterBand(1).DataType
-            )
-            fmask_arr = np.array(fmask_band.ReadAsArray(), dtype=dtype)
-
-            if inverse_mask:
-                vpx_boolean = np.logical_and(fmask_arr != 1, fmask_arr != 5)
-            else:
-                vpx_boolean = np.logical_or(fmask_arr == 1, fmask_arr == 5)
-
-            vpx_arr = vpx_boolean * 1
-            
-            # add radiometry saturation pixels
+            # radiometry saturation pixels
+            ids_ = radio_band = None
             try:
                 rad_pattern = 'radiometry_control_{}m.tif$'.format(
                     self.config['land_product']['geometric_resolution']
                 )
-                radio_input_file = self.filter_files(
-                    os.path.dirname(input_file), pattern=rad_pattern
+                radio_input_file = self._find_files(
+                    os.path.dirname(input_file), rad_pattern
                 )[0]
 
                 ids_ = gdal.Open(radio_input_file, gdalconst.GA_ReadOnly)
                 radio_band = ids_.GetRasterBand(1)
-                radio_arr = radio_band.ReadAsArray()
-                if (radio_arr > 0).any():
-                    np.place(vpx_arr, radio_arr > 0, [0])
+                # no saturated pixels -> skip reading radiometry blocks
+                # (min/max computed by GDAL natively, nodata is 0)
+                try:
+                    radio_minmax = radio_band.ComputeRasterMinMax(False)
+                except RuntimeError:
+                    # all pixels are nodata -> no saturation
+                    radio_minmax = None
+                if not radio_minmax or radio_minmax[1] <= 0:
+                    radio_band = None
             except IndexError:
                 Logger.info("Radiometry file not found in {}.".format(
                     os.path.dirname(input_file)
                 ))
 
-            # save vpx
-            ods.GetRasterBand(1).WriteArray(vpx_arr)
+            # blocks aligned with input raster tiling
+            xblock, yblock = fmask_band.GetBlockSize()
+            xstep = xblock * max(1, self.block_size // xblock)
+            ystep = yblock * max(1, self.block_size // yblock)
+
+            # GDAL datasets are not thread-safe: blocks are read and
+            # written by this thread, vpx is computed by workers (numpy
+            # releases GIL), at most 2 blocks per worker are in flight
+            pending = deque()
+            valid_count = 0
+            max_pending = 2 * self.vpx_workers
+            compute_vpx = self._compute_vpx
+            write_vpx_block = self._write_vpx_block
+            with ThreadPoolExecutor(max_workers=self.vpx_workers) as executor:
+                for yoff in range(0, ysize, ystep):
+                    ywin = min(ystep, ysize - yoff)
+                    for xoff in range(0, xsize, xstep):
+                        xwin = min(xstep, xsize - xoff)
+
+                        fmask_arr = fmask_band.ReadAsArray(xoff, yoff, xwin, ywin)
+                        if radio_band is not None:
+                            radio_arr = radio_band.ReadAsArray(xoff, yoff, xwin, ywin)
+                        else:
+                            radio_arr = None
+
+                        # create vpx (incl. radiometry saturation pixels)
+                        pending.append((xoff, yoff, executor.submit(
+                            compute_vpx, fmask_arr, radio_arr, inverse_mask
+                        )))
+
+                        # save vpx
+                        if len(pending) >= max_pending:
+                            valid_count += write_vpx_block(vpx_band, pending.popleft())
+                while pending:
+                    valid_count += write_vpx_block(vpx_band, pending.popleft())
             # ods.GetRasterBand(1).SetNoDataValue(fmask_band.GetNoDataValue())
 
             # set color table
             style_r = StyleReader(os.path.basename(os.path.dirname(__file__)))
             style_r.set_band_colors(ods)
 
+            # GeoTiff mask -> JPG mask (converted from opened dataset,
+            # output raster is not re-read from disk)
+            output_jpg = None
+            if jpg:
+                ods.FlushCache()
+                output_jpg = self.tif2jpg(output, src=ods)
+
             # cls data sources & write out
-            ids = None
-            ods = None
+            ids = ids_ = None
+            vpx_band = ods = None
+
+            # valid pixels statistics counted while computing vpx
+            valid_pct = int(valid_count / (xsize * ysize) * 100)
+
+            return output_jpg, valid_pct
 
         except RuntimeError as e:
             raise ProcessorFailedError(
@@ -177,6 +278,71 @@ class QCProcessorValidPixelsBase(QCProcessorIPBase, ABC):
                 "VPX processor failed: {}".format (e)
             )
 
+    @staticmethod
+    def _write_vpx_block(band, block):
+        """Write computed vpx block.
+
+        :param band: output GDAL band
+        :param tuple block: x offset, y offset, future of _compute_vpx()
+
+        :return int: number of valid pixels in block
+        """
+        xoff, yoff, future = block
+        vpx_arr, valid_count = future.result()
+        band.WriteArray(vpx_arr, xoff, yoff)
+
+        return valid_count
+
+    @staticmethod
+    def _compute_vpx(fmask_arr, radio_arr=None, inverse_mask=False):
+        """Compute valid pixels from fmask.
+
+        :param array fmask_arr: fmask values
+        :param array radio_arr: radiometry control values (saturated pixels
+                                > 0) or None
+        :param bool inverse_mask: use inverse mask?
+
+        :return tuple: valid pixels (0/1, uint8), number of valid pixels
+        """
+        import numpy as np
+
+        # vpx = fmask in (1, 5) and not saturated, computed in
+        # pre-allocated buffers (output is returned, temporary buffer
+        # is re-used by the worker thread)
+        vpx_boolean = np.empty(fmask_arr.shape, dtype=np.bool_)
+        tmp_boolean = _get_scratch(fmask_arr.shape)
+        np.equal(fmask_arr, 1, out=vpx_boolean)
+        np.equal(fmask_arr, 5, out=tmp_boolean)
+        np.logical_or(vpx_boolean, tmp_boolean, out=vpx_boolean)
+        if inverse_mask:
+            np.logical_not(vpx_boolean, out=vpx_boolean)
+        if radio_arr is not None:
+            np.less_equal(radio_arr, 0, out=tmp_boolean)
+            np.logical_and(vpx_boolean, tmp_boolean, out=vpx_boolean)
+
+        # 0/1 values without copy
+        return vpx_boolean.view(np.uint8), int(np.count_nonzero(vpx_boolean))
+
+    def _find_files(self, dirname, pattern):
+        """Get files by a pattern.
+
+        Same as filter_files(), but the directory is walked only once per
+        IP, listing is re-used by subsequent look-ups.
+
+        :param str dirname: directory
+        :param str pattern: filter by pattern
+
+        :return list: list of found files
+        """
+        if dirname not in self._file_index:
+            self._file_index[dirname] = [
+                (f, os.path.join(rec[0], f))
+                for rec in os.walk(dirname) for f in rec[-1]
+            ]
+
+        _pattern = re.compile(pattern)
+        return [path for f, path in self._file_index[dirname] if _pattern.match(f)]
+
     def _get_arosics_raster(self, data_dir):
         """Get raster produced by Arosics package.
         
@@ -189,7 +355,7 @@ class QCProcessorValidPixelsBase(QCProcessorIPBase, ABC):
         )
 
         try:
-            filepath = self.filter_files(data_dir, pattern=fmask_file+'$')[0]
+            filepath = self._find_files(data_dir, fmask_file+'$')[0]
             return filepath
         except IndexError:
             raise ProcessorFailedError(
@@ -197,19 +363,3 @@ class QCProcessorValidPixelsBase(QCProcessorIPBase, ABC):
                 "No mask file found in {}".format(
                     data_dir
             ))
-
-    def _compute_stats(self, filename):
-        """Compute valid pixels statistics.
-
-        :param str filename: input raster file
-
-        :return int: valid pixels percentage
-        """
-        value, count, ncells = self.compute_value_count(filename)
-
-        vp_Pct = 0.0
-        for idx in range(len(value)):
-            if value[idx] == 1:
-                vp_Pct = count[idx] / ncells * 100
-
-        return int(vp_Pct)
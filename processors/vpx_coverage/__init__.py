@@ -1,9 +1,11 @@
 import os
+import re
 import math
 import datetime
+from concurrent.futures import ThreadPoolExecutor
 
 from processors import QCProcessorLPBase, identifier_from_file, QCPlatformType
-from processors.exceptions import ProcessorFailedError
+from processors.exceptions import ProcessorFailedError, ProcessorCriticalError
 
 from manager.logger import Logger
 from manager.logger.db import DbIpOperationStatus
@@ -11,6 +13,13 @@ from manager.io import JsonIO
 
 from styles import StyleReader
 
+try:
+    import numpy as np
+    from osgeo import gdal, gdalconst, gdal_array
+except ImportError:
+    # reported by QCProcessorVpxCoverage.check_dependency()
+    np = gdal = gdalconst = gdal_array = None
+
 class QCProcessorVpxCoverage(QCProcessorLPBase):
     """Valid pixels coverage control processor [coverage control].
 
@@ -21,6 +30,17 @@ class QCProcessorVpxCoverage(QCProcessorLPBase):
     isMeasurementOf = "ipForLpInformationMetric"
     level2_data = True
 
+    # size of raster blocks (in pixels) processed at once
+    block_size = 1024
+    # number of threads summing valid pixels blocks
+    count_workers = os.cpu_count() or 1
+    # max number of years counted concurrently
+    year_workers = 4
+    # GeoTIFF creation options of vpx coverage raster
+    creation_options = [
+        'TILED=YES', 'COMPRESS=DEFLATE', 'BIGTIFF=IF_SAFER'
+    ]
+
     def __init__(self, config, response):
         super(QCProcessorVpxCoverage, self).__init__(
             config, response
@@ -28,12 +48,23 @@ class QCProcessorVpxCoverage(QCProcessorLPBase):
 
         self.platform_type = None
         self.data_dir_suf = ''
+        # sensing year of IPs (key: IP title, see load_ip_years())
+        self._ip_year_cache = {}
+        # value counts of vpx files counted in this run (key: vpx file,
+        # see count_vpx())
+        self._vpx_counts = {}
+        # input valid pixels files (see find_vpx_files())
+        self._vpx_pattern = re.compile(r'valid_pixels_{}m\.tif$'.format(
+            self.config['land_product']['geometric_resolution']
+        ))
 
     def check_dependency(self):
         """Check processor's software dependencies.
         """
-        import numpy as np
-        from osgeo import gdal, gdalconst, gdal_array
+        if np is None:
+            raise ImportError("No module named 'numpy'")
+        if gdal is None:
+            raise ImportError("No module named 'osgeo'")
 
     def get_output_file(self, year):
         """Get output filename.
@@ -74,8 +105,6 @@ class QCProcessorVpxCoverage(QCProcessorLPBase):
         ip_count = len(processed_ips)
         if ip_count == 0:
             # create empty vpx_coverage file
-            from osgeo import gdal, gdalconst
-
             im_reference = self.config.abs_path(
                 self.config['geometry']['reference_image']
             )
@@ -89,7 +118,7 @@ class QCProcessorVpxCoverage(QCProcessorLPBase):
                 driver = gdal.GetDriverByName('GTiff')
                 ods = driver.Create(out_file,
                                     vpx_band.XSize, vpx_band.YSize,
-                                    eType=vpx_band.DataType)
+                                    eType=gdalconst.GDT_UInt16)
                 ods.SetGeoTransform(itrans)
                 ods.SetProjection(iproj)
 
@@ -104,6 +133,19 @@ class QCProcessorVpxCoverage(QCProcessorLPBase):
                 "No input valid layers found"
             )
 
+        # read sensing years of all IPs at once
+        self.load_ip_years([ip for ip, platform_type, status in processed_ips])
+
+        # data directory suffix of platform types (determined only once)
+        data_dir_suf = {}
+        for platform_type in set(pt for ip, pt, status in processed_ips):
+            self.platform_type = QCPlatformType(platform_type)
+            level2 = self.config['image_products'].get(
+                '{}_processing_level2'.format(self.get_platform_type())
+            )
+            data_dir_suf[platform_type] = \
+                '.SAFE' if level2 == 'S2MSI2A' else ''
+
         for ip, platform_type, status in processed_ips:
             Logger.info("Processing {}... ({}/{})".format(
                 ip, ip_idx, ip_count
@@ -112,11 +154,7 @@ class QCProcessorVpxCoverage(QCProcessorLPBase):
 
             # set current platform type
             self.platform_type = QCPlatformType(platform_type)
-            if self.config['image_products'].get('{}_processing_level2'.format(
-                    self.get_platform_type())) == 'S2MSI2A':
-                self.data_dir_suf = '.SAFE'
-            else:
-                self.data_dir_suf = ''
+            self.data_dir_suf = data_dir_suf[platform_type]
 
             # delete previous results if needed
             if status not in (DbIpOperationStatus.unchanged, DbIpOperationStatus.rejected):
@@ -130,12 +168,7 @@ class QCProcessorVpxCoverage(QCProcessorLPBase):
             data_dir = self.get_data_dir(ip)
 
             try:
-                years[yr] += self.filter_files(
-                    data_dir,
-                    'valid_pixels_{}m.tif'.format(
-                        self.config['land_product']['geometric_resolution']
-                    )
-                )
+                years[yr] += self.find_vpx_files(data_dir)
             except KeyError:
                 raise ProcessorFailedError(
                     self,
@@ -145,6 +178,7 @@ class QCProcessorVpxCoverage(QCProcessorLPBase):
                 )
 
         vpx_files = {}
+        count_jobs = []
         for yr, input_files in years.items():
             if len(input_files) < 1:
                 Logger.warning(
@@ -166,9 +200,24 @@ class QCProcessorVpxCoverage(QCProcessorLPBase):
             Logger.info("Running countVpx for {}: {} layers".format(
                 yr, len(input_files)
             ))
-            # run processor
+            count_jobs.append((input_files, output_file, status))
+
+        if not count_jobs:
+            return vpx_files
+
+        # run processor, years are independent -> counted concurrently
+        # (GDAL I/O and numpy reductions release GIL), count threads are
+        # split between years
+        nworkers = min(len(count_jobs), self.year_workers)
+        workers = max(1, self.count_workers // nworkers)
+        with ThreadPoolExecutor(max_workers=nworkers) as executor:
+            futures = [
+                executor.submit(self.count_vpx, input_files, output_file, workers)
+                for input_files, output_file, status in count_jobs
+            ]
+        for future, (input_files, output_file, status) in zip(futures, count_jobs):
             try:
-                self.count_vpx(input_files, output_file)
+                future.result()
             except ProcessorFailedError:
                 pass
 
@@ -182,12 +231,80 @@ class QCProcessorVpxCoverage(QCProcessorLPBase):
 
         return vpx_files
 
+    def find_vpx_files(self, dirname):
+        """Get input valid pixels files.
+
+        Same as filter_files(), but directory entries are scanned by
+        os.scandir() and matched by pattern compiled only once.
+
+        :param str dirname: directory
+
+        :return list: list of found files
+        """
+        files = []
+        subdirs = []
+        try:
+            with os.scandir(dirname) as it:
+                for entry in it:
+                    if entry.is_dir():
+                        # symlinks not followed (as os.walk() does)
+                        if not entry.is_symlink():
+                            subdirs.append(entry.path)
+                    elif self._vpx_pattern.search(entry.name):
+                        files.append(entry.path)
+        except OSError:
+            # unreadable directory skipped (as os.walk() does)
+            return files
+
+        for subdir in subdirs:
+            files += self.find_vpx_files(subdir)
+
+        return files
+
+    def load_ip_years(self, ips):
+        """Read sensing years of image products in one pass.
+
+        Metadata files are read in parallel (file I/O releases GIL),
+        years are cached for get_ip_year(). Unreadable metadata are
+        skipped (reported later by get_ip_year()).
+
+        :param list ips: image product titles
+        """
+        def _read_year(ip):
+            try:
+                return self._read_ip_year(ip)
+            except (OSError, ValueError, KeyError):
+                return None
+
+        ips = [ip for ip in ips if ip not in self._ip_year_cache]
+        if not ips:
+            return
+
+        with ThreadPoolExecutor(
+                max_workers=min(len(ips), self.count_workers)) as executor:
+            for ip, yr in zip(ips, executor.map(_read_year, ips)):
+                if yr is not None:
+                    self._ip_year_cache[ip] = yr
+
     def get_ip_year(self, ip):
-        """Get image product filename.
+        """Get image product sensing year.
+
+        :param str ip: image product title
+
+        :return int: year
+        """
+        try:
+            return self._ip_year_cache[ip]
+        except KeyError:
+            yr = self._ip_year_cache[ip] = self._read_ip_year(ip)
+            return yr
+
+    def _read_ip_year(self, ip):
+        """Read image product sensing year from metadata file.
 
         :param str ip: image product title
 
-        :return dict: metadata
+        :return int: year
         """
         meta_data = JsonIO.read(
             os.path.join(
@@ -198,61 +315,114 @@ class QCProcessorVpxCoverage(QCProcessorLPBase):
 
         return meta_data['Sensing start'].year
 
-    def count_vpx(self, input_files, output_file):
+    def count_vpx(self, input_files, output_file, workers=None):
         """
         Perform valid pixels coverage.
 
         0: "noData", 1: "valid", 2: "clouds", 3: "shadows", 4: "snow", 5: "water"
 
+        Rasters are processed by blocks (see block_size).
+
         Raise ProcessorFailedError on failure.
 
         :param list input_files: list of input files
         :param str output_file: output filename
+        :param int workers: number of threads summing blocks (defaults to
+                            count_workers)
         """
-        import numpy as np
-        from osgeo import gdal, gdalconst, gdal_array
-
+        workers = workers or self.count_workers
         try:
-            # open input data
-            ids = gdal.Open(input_files[0], gdalconst.GA_ReadOnly)
-            iproj = ids.GetProjection()
-            itrans = ids.GetGeoTransform()
-            vpx_band = ids.GetRasterBand(1)
+            # open input data (kept open for all blocks)
+            ids_list = [gdal.Open(f, gdalconst.GA_ReadOnly) for f in input_files]
+            vpx_bands = [ids.GetRasterBand(1) for ids in ids_list]
+            iproj = ids_list[0].GetProjection()
+            itrans = ids_list[0].GetGeoTransform()
+            vpx_band = vpx_bands[0]
+            xsize = vpx_band.XSize
+            ysize = vpx_band.YSize
+            # inputs are summed pixel by pixel -> same grid required
+            for f, ids in zip(input_files, ids_list):
+                if ids.GetGeoTransform() != itrans or \
+                   (ids.RasterXSize, ids.RasterYSize) != (xsize, ysize):
+                    raise ProcessorFailedError(
+                        self,
+                        "Count Vpx processor failed: {} does not match "
+                        "grid of {}".format(f, input_files[0])
+                    )
 
-            # open output data
-            driver = gdal.GetDriverByName ('GTiff')
-            ods = driver.Create(output_file,
-                                vpx_band.XSize, vpx_band.YSize,
-                                eType=vpx_band.DataType)
+            # create output data in memory (counts stored as UInt16,
+            # Byte would overflow for more than 255 input files), output
+            # file is written at once when completed
+            ods = gdal.GetDriverByName('MEM').Create(
+                '', xsize, ysize, 1, gdalconst.GDT_UInt16
+            )
             ods.SetGeoTransform(itrans)
             ods.SetProjection(iproj)
+            count_band = ods.GetRasterBand(1)
 
-            # create countVpx array
+            # input blocks are kept in source data type, countVpx array
+            # is accumulated in uint16
             dtype = gdal_array.GDALTypeCodeToNumericTypeCode(
-                ids.GetRasterBand(1).DataType
+                vpx_band.DataType
             )
-            # dtype vs. no of images < 255 ?
-            vpx_count = np.zeros((vpx_band.YSize, vpx_band.XSize), dtype=dtype)
-            ids = None
-
-            # count valid pixels
-            for i in range(len(input_files)):
-                ids = gdal.Open(input_files[i], gdalconst.GA_ReadOnly)
-                vpx_band = ids.GetRasterBand(1)
-                vpx_arr = vpx_band.ReadAsArray()
 
-                vpx_count += vpx_arr
-
-            # save count
-            ods.GetRasterBand(1).WriteArray(vpx_count)
+            # count valid pixels by blocks aligned with input raster tiling,
+            # input blocks are read into a stack (one layer per input file)
+            # and summed by a single reduction, block buffers are re-used
+            # while block shape does not change; windows with no data
+            # in the input file (sparse blocks outside of IP footprint)
+            # are not read at all
+            xblock, yblock = vpx_band.GetBlockSize()
+            xstep = xblock * max(1, self.block_size // xblock)
+            ystep = yblock * max(1, self.block_size // yblock)
+            vpx_count = vpx_stack = None
+            counts = np.zeros(1, dtype=np.int64)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for yoff in range(0, ysize, ystep):
+                    ywin = min(ystep, ysize - yoff)
+                    for xoff in range(0, xsize, xstep):
+                        xwin = min(xstep, xsize - xoff)
+                        if vpx_count is None or vpx_count.shape != (ywin, xwin):
+                            vpx_count = np.empty((ywin, xwin), dtype=np.uint16)
+                            vpx_stack = np.empty(
+                                (len(vpx_bands), ywin, xwin), dtype=dtype
+                            )
+
+                        data_bands = [
+                            band for band in vpx_bands
+                            if band.GetDataCoverageStatus(
+                                    xoff, yoff, xwin, ywin)[0] != \
+                               gdal.GDAL_DATA_COVERAGE_STATUS_EMPTY
+                        ]
+                        nlayers = len(data_bands)
+                        for i, band in enumerate(data_bands):
+                            band.ReadAsArray(xoff, yoff, xwin, ywin,
+                                             buf_obj=vpx_stack[i])
+                        self._sum_stack(
+                            executor, vpx_stack[:nlayers], vpx_count, workers
+                        )
+
+                        # save count, value counts are collected for stats
+                        count_band.WriteArray(vpx_count, xoff, yoff)
+                        block_counts = np.bincount(vpx_count.ravel())
+                        if block_counts.size > counts.size:
+                            block_counts[:counts.size] += counts
+                            counts = block_counts
+                        else:
+                            counts[:block_counts.size] += block_counts
             # ods.GetRasterBand(1).SetNoDataValue(vpx_band.GetNoDataValue())
 
             # set color table
             StyleReader(self.identifier).set_band_colors(ods)
 
-            # close data sources & write out
-            ids = None
-            ods = None
+            # write out (single compressed write) & close data sources
+            vpx_band = vpx_bands = data_bands = count_band = None
+            ids_list = None
+            tds = gdal.GetDriverByName('GTiff').CreateCopy(
+                output_file, ods, options=self.creation_options
+            )
+            tds = ods = None
+            self._vpx_counts[output_file] = counts
 
         except RuntimeError as e:
             raise ProcessorFailedError(
@@ -260,29 +430,65 @@ class QCProcessorVpxCoverage(QCProcessorLPBase):
                 "Count Vpx processor failed: {}".format(e)
             )
 
+    def _sum_stack(self, executor, stack, out, nchunks):
+        """Sum stack layers in parallel.
+
+        Rows are split into chunks reduced by executor threads (numpy
+        releases GIL). Layers are accumulated in output data type.
+
+        :param executor: thread pool executor
+        :param array stack: 3-D array (layer, row, col)
+        :param array out: output 2-D array (row, col)
+        :param int nchunks: number of row chunks
+        """
+        def _sum_rows(rows):
+            np.add.reduce(stack[:, rows[0]:rows[1]], axis=0,
+                          dtype=out.dtype, out=out[rows[0]:rows[1]])
+
+        nrows = out.shape[0]
+        step = max(1, -(-nrows // nchunks))
+        list(executor.map(
+            _sum_rows, [(r, min(r + step, nrows)) for r in range(0, nrows, step)]
+        ))
+
     def compute_vpx_stats(self, vpx_file):
         """Compute stats for valid pixels coverage.
 
+        Raise ProcessorCriticalError on failure.
+
+        Value counts collected by count_vpx() are used if available,
+        otherwise vpx file is read (count_vpx() skipped).
+
         :param str vpx_file: vpx file path
 
         :return dict: QI metadata
         """
-        from osgeo import gdal
+        counts = self._vpx_counts.pop(vpx_file, None)
 
-        # compute min/max
-        value, count, ncells = self.compute_value_count(vpx_file)
-        vpx_pct = 0.0
-        for idx in range(len(value)):
-            if value[idx] == 0:
-                vpx_pct = count[idx] / ncells * 100
+        # compute min/max (value counts in one pass) and JPG mask from
+        # the same opened dataset (blocks already in GDAL cache)
+        try:
+            ds = gdal.Open(vpx_file, gdalconst.GA_ReadOnly)
+            if counts is None:
+                counts = np.bincount(
+                    ds.GetRasterBand(1).ReadAsArray().ravel()
+                )
+            vpx_jpg = self.tif2jpg(vpx_file, src=ds)
+            ds = None
+        except RuntimeError as e:
+            raise ProcessorCriticalError(
+                self,
+                "Computing value/count statistics failed: {}".format(e)
+            )
+        value = np.flatnonzero(counts)
+        vpx_pct = counts[0] / counts.sum() * 100
 
         data = {
-            "min": int(min(value)),
-            "max": int(max(value)),
-            "gapPct": round(vpx_pct, 4),
-            "mask": self.file_basename(self.tif2jpg(vpx_file))
+            "min": int(value[0]),
+            "max": int(value[-1]),
+            "gapPct": round(float(vpx_pct), 4),
+            "mask": self.file_basename(vpx_jpg)
         }
-        ds = None
 
         return data
 
@@ -1,6 +1,5 @@
 import os
-
-from collections import OrderedDict
+from functools import lru_cache
 
 from xml.etree import ElementTree
 
@@ -9,6 +8,113 @@ class StyleReaderError(Exception):
     pass
 
 
+@lru_cache(maxsize=32)
+def _read_sld_file(filename):
+    """Read style from input SLD file.
+
+    Parsed files are cached.
+
+    :param str filename: SLD file (absolute path)
+
+    :return tuple: values (sorted), RGB colors
+    """
+    # SLD streamed (no document tree built), color map entries are
+    # collected from the first ColorMap of the first RasterSymbolizer
+    ns_prefix = None
+    rs_tag = cl_tag = ce_tag = None
+    rs_found = cl_found = False
+    depth = 0
+    rs_depth = cl_depth = -1
+    quantities = []
+    hex_colors = []
+    for event, elem in ElementTree.iterparse(filename, events=('start', 'end')):
+        if event == 'start':
+            depth += 1
+            if ns_prefix is None:
+                if not elem.tag.endswith('StyledLayerDescriptor'):
+                    raise StyleReaderError(
+                        "File {} is not a valid SLD".format(filename)
+                    )
+                ns_prefix = elem.tag[:elem.tag.index('}')+1]
+                rs_tag = ns_prefix + 'RasterSymbolizer'
+                cl_tag = ns_prefix + 'ColorMap'
+                ce_tag = ns_prefix + 'ColorMapEntry'
+            elif elem.tag == rs_tag and not rs_found:
+                rs_found = True
+                rs_depth = depth
+            elif elem.tag == cl_tag and depth == rs_depth + 1 \
+                 and not cl_found:
+                cl_found = True
+                cl_depth = depth
+            continue
+
+        # end event
+        if elem.tag == ce_tag and depth == cl_depth + 1:
+            quantities.append(int(elem.attrib.get('quantity')))
+            hex_colors.append(elem.attrib.get('color').lstrip('#'))
+            elem.clear()
+        elif elem.tag == cl_tag and depth == cl_depth:
+            # color map done, rest of file not needed
+            break
+        elif elem.tag == rs_tag and depth == rs_depth:
+            rs_depth = -1
+        depth -= 1
+
+    if not rs_found:
+        raise StyleReaderError(
+            "File {} is not a valid SLD: no RasterSymbolizer defined".format(
+                filename
+        ))
+    if not cl_found:
+        raise StyleReaderError(
+            "File {} is not a valid SLD: no ColorMap defined".format(
+                filename
+        ))
+    if not quantities:
+        raise StyleReaderError(
+            "No color entries defined in file {}".format(
+                filename
+        ))
+
+    # values and colors stored as parallel arrays sorted by value
+    import numpy as np
+
+    values = np.array(quantities, dtype=np.int32)
+    # all colors decoded at once (RRGGBB -> 3 bytes)
+    colors = np.frombuffer(
+        bytes.fromhex(''.join(h[:6] for h in hex_colors)), dtype=np.uint8
+    ).reshape(-1, 3)
+    order = np.argsort(values, kind='stable')
+    values = values[order]
+    colors = colors[order]
+
+    for arr in (values, colors):
+        arr.setflags(write=False)
+
+    return values, colors
+
+
+@lru_cache(maxsize=32)
+def _color_table(filename):
+    """Build GDAL color table from input SLD file.
+
+    Color tables are cached, GDAL copies the table when assigned to
+    a band.
+
+    :param str filename: SLD file (absolute path)
+
+    :return gdal.ColorTable: color table (shared, do not modify)
+    """
+    from osgeo import gdal
+
+    values, colors = _read_sld_file(filename)
+    color_table = gdal.ColorTable()
+    for v, rgb in zip(values.tolist(), colors.tolist()):
+        color_table.SetColorEntry(v, tuple(rgb))
+
+    return color_table
+
+
 class StyleReader:
     """Raster style reader
 
@@ -24,53 +130,16 @@ class StyleReader:
                 os.path.dirname(__file__),
                 self._filename
             )
-        
-        self._read_sld_file()
-
-    def _read_sld_file(self):
-        """Read style from input SLD file"""
-        with open(self._filename, encoding='utf-8') as fd:
-            root = ElementTree.fromstring(fd.read())
-            if not root.tag.endswith('StyledLayerDescriptor'):
-                raise StyleReaderError(
-                    "File {} is not a valid SLD".format(self._filename)
-                )
-
-            ns_prefix = root.tag[:root.tag.index('}')+1]
-            ns_dict = {'sld': ns_prefix[1:-1]}
-            rs_node = root.find('.//sld:RasterSymbolizer', ns_dict)
-            if rs_node is None:
-                raise StyleReaderError(
-                    "File {} is not a valid SLD: no RasterSymbolizer defined".format(
-                        self._filename
-                ))
-            cl_node = rs_node.find('sld:ColorMap', ns_dict)
-            if cl_node is None:
-                raise StyleReaderError(
-                    "File {} is not a valid SLD: no ColorMap defined".format(
-                        self._filename
-                ))
-
-            cl_entries = cl_node.findall('sld:ColorMapEntry', ns_dict)
-            if not cl_entries:
-                raise StyleReaderError(
-                    "No color entries defined in file {}".format(
-                        self._filename
-                ))
-
-            self._vc = OrderedDict()
-            for ce in cl_entries:
-                v = int(ce.attrib.get('quantity'))
-                h = ce.attrib.get('color').lstrip('#')
-                rgb = tuple(int(h[i:i+2], 16) for i in (0, 2, 4))
-                self._vc[v] = rgb
+
+        # parsed SLD files are shared (read-only arrays)
+        self._values, self._colors = _read_sld_file(self._filename)
 
     def get_values(self):
         """Get values
 
         :return list: list of values
         """
-        return self._vc.keys()
+        return self._values.tolist()
 
     def get_rgb_color(self, value):
         """Get RGB color code for specified value
@@ -79,7 +148,13 @@ class StyleReader:
 
         :return tuple: RGB codes
         """
-        return self._vc[value]
+        import numpy as np
+
+        idx = np.searchsorted(self._values, value)
+        if idx >= len(self._values) or self._values[idx] != value:
+            raise KeyError(value)
+
+        return tuple(self._colors[idx].tolist())
 
     def set_band_colors(self, ds, ib=1):
         """Set color table for specifed GDAL band
@@ -89,12 +164,8 @@ class StyleReader:
         """
         from osgeo import gdal
 
-        colors = gdal.ColorTable()
-        for v in self.get_values():
-            colors.SetColorEntry(v, self.get_rgb_color(v))
-
         band = ds.GetRasterBand(ib)
-        band.SetRasterColorTable(colors)
+        band.SetRasterColorTable(_color_table(self._filename))
         band.SetRasterColorInterpretation(gdal.GCI_PaletteIndex)
         band = None
 
@@ -2,46 +2,69 @@
 
 import os
 import yaml
+import pytest
 
 from manager.logger import Logger
 
 
+@pytest.fixture(scope='session')
+def parsed_test_config():
+    """Test config parsed only once per session (C-based loader if
+    available)."""
+    with open(config_files[3]) as config_yaml:
+        return yaml.load(
+            config_yaml, Loader=getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+        )
+
+
+@pytest.fixture(scope='session')
+def log_dir(pytestconfig, parsed_test_config):
+    """Logging directory defined by test config."""
+    return os.path.join(
+        pytestconfig.rootdir, parsed_test_config['logging']['directory']
+    )
+
+
+@pytest.fixture(scope='module')
+def cleaned_up():
+    """Data and logs cleaned up once before the first individual
+    processor run (each run cleans up after itself)."""
+    from manager import QCManager
+    QCManager(
+        config_file_all,
+        cleanup=-1
+    )
+
+
 class TestProcessors:
 
     @staticmethod
-    def test_tc_026a(pytestconfig):
+    @pytest.mark.parametrize('test_id', range(1, 7))
+    def test_tc_026a(cleaned_up, log_dir, test_id):
         """Run one individual QC Manager processor
 
         This test case consists to check that the QC Manager runs individual
         QC Manager processor.
+
+        Note: steps share logging directory, must not be run concurrently.
         """
         from bin import run_manager
         from manager import QCManager
+
+        assert not os.path.isdir(log_dir), \
+            'Logs not cleaned up - no way to check if the next ' \
+            'processor works or not'
+        ip_config_file = os.path.join(
+            _root_dir, 'tests',
+            'manager_tests_configs', 'test_{}.yaml'.format(test_id))
+        test_config_files = config_files + [ip_config_file]
+        run_manager.main(test_config_files)
+        assert len(os.listdir(log_dir)) > 1, \
+            'No logs created for config test_{}.yaml'.format(test_id)
         QCManager(
             config_file_all,
             cleanup=-1
         )
-
-        with open(config_files[3]) as config_yaml:
-            parsed_config = yaml.load(config_yaml, Loader=yaml.FullLoader)
-            log_dir_rel = parsed_config['logging']['directory']
-            log_dir = os.path.join(pytestconfig.rootdir, log_dir_rel)
-
-            for test_id in range(1, 7):
-                assert not os.path.isdir(log_dir), \
-                    'Logs not cleaned up - no way to check if the next ' \
-                    'processor works or not'
-                ip_config_file = os.path.join(
-                    os.path.dirname(__file__), '..', 'tests',
-                    'manager_tests_configs', 'test_{}.yaml'.format(test_id))
-                test_config_files = config_files + [ip_config_file]
-                run_manager.main(test_config_files)
-                assert len(os.listdir(log_dir)) > 1, \
-                    'No logs created for config test_{}.yaml'.format(test_id)
-                QCManager(
-                    config_file_all,
-                    cleanup=-1
-                )
         Logger.info("Running individual QC Manager processor")
 
     @staticmethod
@@ -56,53 +79,37 @@ class TestProcessors:
         Logger.info("Running set of QC Manager processors")
 
     @staticmethod
-    def test_tc_027(pytestconfig):
+    def test_tc_027(log_dir):
         """Test if JSON metadata were created in the previous test.
 
         This test case consists to check that the QC Manager creates JSON
         metadata to be passed to Catalog.
         """
-        with open(config_files[3]) as config_yaml:
-            parsed_config = yaml.load(config_yaml, Loader=yaml.FullLoader)
-            log_dir_rel = parsed_config['logging']['directory']
-            log_dir = os.path.join(pytestconfig.rootdir, log_dir_rel)
-            assert len(os.listdir(log_dir)) > 1, \
-                'No logs to be checked'
-
-            for i in os.listdir(log_dir):
-                if os.path.isdir(os.path.join(log_dir, i)):
-                    for root, dirs, files in os.walk(os.path.join(log_dir, i)):
-                        assert all('json' in file for file in files), \
-                            'Dir {} not containing any .json file'.format(root)
+        assert len(os.listdir(log_dir)) > 1, \
+            'No logs to be checked'
+
+        for i in os.listdir(log_dir):
+            if os.path.isdir(os.path.join(log_dir, i)):
+                for root, dirs, files in os.walk(os.path.join(log_dir, i)):
+                    assert all('json' in file for file in files), \
+                        'Dir {} not containing any .json file'.format(root)
 
         Logger.info("Creating JSON metadata")
 
 
+# canonical paths (no '..' segments), also used as config cache keys
+_root_dir = os.path.realpath(os.path.join(os.path.dirname(__file__), '..'))
+
 config_files = [
-    os.path.join(
-        os.path.dirname(__file__), '..', 'config.yaml'),
-    os.path.join(
-        os.path.dirname(__file__), '..', 'use_cases',
-        'tuc1_imd_2018_010m', 'tuc1_imd_2018_010m_prague.yaml'),
-    os.path.join(
-        os.path.dirname(__file__), '..', 'use_cases',
-        'tuc1_imd_2018_010m', 'tuc1_imd_2018_010m_prague_sample.yaml'),
-    os.path.join(
-        os.path.dirname(__file__), '..', 'tests', 'test.yaml'),
+    os.path.join(_root_dir, 'config.yaml'),
+    os.path.join(_root_dir, 'use_cases',
+                 'tuc1_imd_2018_010m', 'tuc1_imd_2018_010m_prague.yaml'),
+    os.path.join(_root_dir, 'use_cases',
+                 'tuc1_imd_2018_010m', 'tuc1_imd_2018_010m_prague_sample.yaml'),
+    os.path.join(_root_dir, 'tests', 'test.yaml'),
 ]
 
-config_file_all = [
-    os.path.join(
-        os.path.dirname(__file__), '..', 'config.yaml'),
-    os.path.join(
-        os.path.dirname(__file__), '..', 'use_cases',
-        'tuc1_imd_2018_010m', 'tuc1_imd_2018_010m_prague.yaml'),
-    os.path.join(
-        os.path.dirname(__file__), '..', 'use_cases',
-        'tuc1_imd_2018_010m', 'tuc1_imd_2018_010m_prague_sample.yaml'),
-    os.path.join(
-        os.path.dirname(__file__), '..', 'tests', 'test.yaml'),
-    os.path.join(
-        os.path.dirname(__file__), '..', 'tests', 'manager_tests_configs',
-        'test_all.yaml')
+config_file_all = config_files + [
+    os.path.join(_root_dir, 'tests', 'manager_tests_configs',
+                 'test_all.yaml')
 ]
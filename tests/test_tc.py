@@ -1,12 +1,43 @@
 import os
-import copy
+import bisect
+import pickle
+from operator import itemgetter
+import pytest
 
 from manager import QCManager
 from manager.logger import Logger
 from manager.logger.db import DbIpOperationStatus
+from processors.search import QCProcessorSearch
+from processors.download import QCProcessorDownload
+from processors.valid_pixels import QCProcessorValidPixels
+from processors.lp_init import QCProcessorLPInit
+from processors.vpx_coverage import QCProcessorVpxCoverage
+
+try:
+    import numpy as np
+    from osgeo import gdal
+except ImportError:
+    # pixel coding tests skipped (see TestsBase.check_pixel_coding())
+    np = gdal = None
+
+def _deepcopy(obj):
+    """Deep copy of responses.
+
+    Pickle round-trip is considerably faster than copy.deepcopy()
+    (shared references are kept as well).
+    """
+    return pickle.loads(pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL))
+
+# config files already cleaned up in this session
+_cleaned_up = set()
 
 def _cleanup(request, config_files):
-    # clean-up
+    # clean-up (only once per session for given config files, logs of
+    # the tests already run must be kept)
+    key = tuple(config_files)
+    if key in _cleaned_up:
+        return
+    _cleaned_up.add(key)
     QCManager(
         config_files,
         cleanup=-1
@@ -18,6 +49,7 @@ def _setup(request, config_files):
         config_files,
         quiet=True
     )
+    request.cls._project_path = request.cls._manager.config['project']['path']
     request.cls._num_responses = {
         'ip': 0,
         'lp': 0
@@ -27,10 +59,20 @@ def _setup(request, config_files):
         'lp': [],
         'current': None
     }
+    # processors shared by test cases, stored with the response list
+    # they are bound to (see TestsBase.get_processor())
+    request.cls._processor_cache = {}
+    # vpx coverage output files (key: year, see do_012_036())
+    request.cls._vpx_output = {}
 
 def _teardown(request):
     for response_type in ('ip', 'lp'):
-        request.cls._manager.response = copy.deepcopy(request.cls._response[response_type])
+        responses = request.cls._response[response_type]
+        if not responses:
+            # nothing to save
+            continue
+        # responses are only rendered by save_response() -> no copy
+        request.cls._manager.response = list(responses)
         request.cls._manager.save_response()
 
 
@@ -39,6 +81,13 @@ class TestsBase:
 
     Contains tests mutual for both TUCs and methods useful for more tests.
     """
+    # value type checkers shared by all tests (see check_value_type())
+    _IS_BOOL = staticmethod(bool.__instancecheck__)
+    _IS_INT = staticmethod(int.__instancecheck__)
+    _IS_FLOAT = staticmethod(float.__instancecheck__)
+    _IS_STR = staticmethod(str.__instancecheck__)
+    # number of raster rows read at once by check_pixel_coding()
+    pixel_coding_rows = 1024
 
     def set_response_type(self, response_type, copy_responses=False):
         """Set response type to IP or LP.
@@ -49,73 +98,115 @@ class TestsBase:
         """
         if response_type != self._response['current']:
             self._manager.reset_response()
+        elif self._response[response_type] is self._manager.response:
+            # current responses are already the stored ones, nothing to
+            # restore
+            copy_responses = False
         if copy_responses:
-            self._manager.response = copy.deepcopy(self._response[response_type])
+            # restored responses are modified by processors -> deep copy
+            self._manager.response = _deepcopy(self._response[response_type])
         self._response['current'] = response_type
 
-    def check_responses(self, isMeasurementOf, attribute, condition,
-                        check_missing_value=True):
-        def get_dict_value(item, attribute):
-            try:
-                current = item[list(attribute.keys())[0]]
+    @staticmethod
+    def _value_accessor(attribute):
+        """Get value accessor of isMeasurementOf item.
+
+        :param attribute: attribute (str, dict or tuple)
+
+        :return func: accessor returning list of values or None
+        """
+        def dict_getter(attribute):
+            key, subkey = next(iter(attribute.items()))
+            get_subkey = itemgetter(subkey)
+
+            def get_dict_value(item):
+                try:
+                    current = item[key]
+                except KeyError:
+                    return None
                 if not isinstance(current, list):
                     current = [current]
-                value = []
-                for c in current:
-                    value.append(c.get(list(attribute.values())[0]))
-            except KeyError:
-                value = None
+                try:
+                    # C-level lookup when all entries define subkey
+                    return list(map(get_subkey, current))
+                except KeyError:
+                    return [c.get(subkey) for c in current]
+
+            return get_dict_value
 
-            return value
+        def value_getter(attribute):
+            return lambda item: [item.get(attribute)]
+
+        if isinstance(attribute, dict):
+            return dict_getter(attribute)
+
+        if isinstance(attribute, tuple):
+            if isinstance(attribute[0], str):
+                getter = value_getter
+            elif isinstance(attribute[0], dict):
+                getter = dict_getter
+            get_list = getter(attribute[0])
+            get_nested = getter(attribute[2])
+            index = attribute[1]
+
+            def get_item_value(item):
+                return [get_nested(v[index])[0] for v in get_list(item) or ()]
+
+            return get_item_value
+
+        return value_getter(attribute)
+
+    def check_responses(self, isMeasurementOf, attribute, condition,
+                        check_missing_value=True):
+        self.check_responses_multi(
+            isMeasurementOf, [(attribute, condition)], check_missing_value
+        )
 
-        def get_value(item, attribute):
-            return [item.get(attribute)]
+    def check_responses_multi(self, isMeasurementOf, checks,
+                              check_missing_value=True):
+        """Check more attributes of isMeasurementOf item in one pass.
 
-        # update: copy responses from manager
+        :param str isMeasurementOf: isMeasurementOf tag name
+        :param list checks: list of (attribute, condition) pairs
+        :param bool check_missing_value: True to allow missing values only
+            for rejected IPs
+        """
+        # update: reference responses from manager (responses are only
+        # read by tests, manager response stack is replaced on reset and
+        # restored by copy, see set_response_type())
         response_type = self._response['current']
-        self._response[response_type] = copy.deepcopy(self._manager.response)
+        self._response[response_type] = self._manager.response
+
+        if not self._response[response_type]:
+            # nothing to check
+            return
+
+        # value accessors resolved once (not per response)
+        accessors = [
+            (attribute, self._value_accessor(attribute), condition)
+            for attribute, condition in checks
+        ]
 
         for response in self._response[response_type]:
-            status = response.status
             item = response.get(
                 isMeasurementOf
             )
-            value = None
-            if item:
-                if isinstance(attribute, dict):
-                    value = get_dict_value(item, attribute)
-                elif isinstance(attribute, tuple):
-                    value_list = None
-
-                    if isinstance(attribute[0], str):
-                        func = get_value
-                    elif isinstance(attribute[0], dict):
-                        func = get_dict_value
-
-                    value_list = func(item, attribute[0])
-
-                    if value_list is not None:
-                        value = []
-                        for v in value_list:
-                            v_index = v[attribute[1]]
-                            val = func(v_index, attribute[2])[0]
-                            value.append(val)
+            for attribute, get_item_value, condition in accessors:
+                value = get_item_value(item) if item else None
+
+                if isinstance(value, list):
+                    non_none_vals = [v for v in value if v is not None]
+                    if len(non_none_vals) == 0:
+                        value = None
+
+                if value is None:
+                    if check_missing_value:
+                        # missing value only allowed for rejected IP
+                        assert response.status == DbIpOperationStatus.rejected
                 else:
-                    value = get_value(item, attribute)
 
-            if isinstance(value, list):
-                non_none_vals = [v for v in value if v is not None]
-                if len(non_none_vals) == 0:
-                    value = None
-
-            if value is None:
-                if check_missing_value:
-                    # missing value only allowed for rejected IP
-                    assert response.status == DbIpOperationStatus.rejected
-            else:
-
-                for v in non_none_vals:
-                    assert condition(v), 'Wrong value of attribute {}'.format(attribute)
+                    for v in non_none_vals:
+                        assert condition(v), 'Wrong value of attribute {}'.format(attribute)
 
     @staticmethod
     def check_value_one(allowed_value):
@@ -139,17 +230,38 @@ class TestsBase:
 
         :param allowed_type: Allowed data type of value
         """
+        if isinstance(allowed_type, type):
+            # C-level method, no lambda frame
+            return allowed_type.__instancecheck__
         return lambda value: isinstance(value, allowed_type)
 
     def check_file_exists(self):
-        return lambda value: os.path.isfile(
-            os.path.join(self._manager.config['project']['path'], value)
-        )
+        # files listed once per directory (checker is created for each
+        # check_responses() call)
+        listing = {}
+
+        def _check_file_exists(value):
+            dirname, filename = os.path.split(
+                os.path.join(self._project_path, value)
+            )
+            if dirname not in listing:
+                try:
+                    with os.scandir(dirname or '.') as it:
+                        listing[dirname] = {
+                            entry.name for entry in it if entry.is_file()
+                        }
+                except OSError:
+                    listing[dirname] = set()
+
+            return filename in listing[dirname]
+
+        return _check_file_exists
 
     def check_pixel_coding(self, allowed_value):
+        if gdal is None:
+            pytest.skip("GDAL/numpy not available")
+
         def _check_pixel_coding(path, filename, allowed_value):
-            from osgeo import gdal
-            import numpy as np
             basename, ext = os.path.splitext(filename)
             if ext == '.gml':
                 # skip vector mask file
@@ -158,19 +270,89 @@ class TestsBase:
                 ext = '.tif' # switch from JPEG (RGB) to TIF (one band)
             ds = gdal.Open(os.path.join(path, basename + ext))
             band = ds.GetRasterBand(1)
-            array = np.array(band.ReadAsArray())
-            ds = None
-            value = np.unique(array, return_counts=False)
-            value.sort()
-
-            return all([i in allowed_value for i in value])
+            allowed = np.asarray(list(allowed_value))
+
+            # check by windows of whole block rows (at least
+            # pixel_coding_rows rows, striped rasters have one-row
+            # blocks), stop on first disallowed value
+            yblock = band.GetBlockSize()[1]
+            ystep = yblock * max(1, self.pixel_coding_rows // yblock)
+            for yoff in range(0, band.YSize, ystep):
+                array = band.ReadAsArray(
+                    0, yoff, band.XSize, min(ystep, band.YSize - yoff)
+                )
+                if not np.isin(array, allowed).all():
+                    return False
+
+            return True
 
         return lambda value: _check_pixel_coding(
-            self._manager.config['project']['path'],
+            self._project_path,
             value,
             allowed_value
         )
 
+    def _cached_processor(self, key, create):
+        """Get processor from cache of processors shared by test cases.
+
+        Processors are bound to manager response list, cached processor
+        is re-created when response list changed (see
+        set_response_type()).
+
+        :param key: cache key
+        :param func create: function creating processor instance
+
+        :return: processor instance
+        """
+        try:
+            response, processor = self._processor_cache[key]
+            if response is self._manager.response:
+                return processor
+        except KeyError:
+            pass
+        processor = create()
+        self._processor_cache[key] = (self._manager.response, processor)
+
+        return processor
+
+    def get_processor(self, processor_class):
+        """Get processor instance shared by test cases.
+
+        Processor is created only once per test class and response list.
+
+        :param processor_class: processor class
+
+        :return: processor instance
+        """
+        return self._cached_processor(
+            processor_class,
+            lambda: processor_class(
+                self._manager.config, self._manager.response
+            )
+        )
+
+    def get_search_processor(self, ptype, connect=False):
+        """Get sensor search processor shared by test cases.
+
+        Sensor processor is created (and connected) only once per test
+        class and response list.
+
+        :param str ptype: platform type ('primary' or 'supplementary')
+        :param bool connect: connect provider API if not connected yet
+
+        :return: sensor processor instance
+        """
+        processor = self._cached_processor(
+            (QCProcessorSearch, ptype),
+            lambda: self.get_processor(QCProcessorSearch).get_processor_sensor(
+                self.get_platform(ptype), ptype
+            )
+        )
+        if connect and getattr(processor, 'connector', None) is None:
+            processor.connector = processor.connect()
+
+        return processor
+
     def get_platform(self, ptype):
         try:
             return self._manager.config['image_products']['{}_platform'.format(ptype)]
@@ -188,12 +370,14 @@ class TestsBase:
         """
         self.set_response_type('ip')
 
-        assert self._manager.config.has_section('land_product')
-        assert self._manager.config['land_product']['product_abbrev']
-        assert self._manager.config['land_product']['geometric_resolution'] > 0
-        assert self._manager.config['land_product']['epsg'] > 0
-        assert self._manager.config['land_product']['geometric_accuracy'] > 0
-        assert self._manager.config['land_product']['thematic_accuracy'] > 0
+        config = self._manager.config
+        assert config.has_section('land_product')
+        lp = config['land_product']
+        assert lp['product_abbrev']
+        assert lp['geometric_resolution'] > 0
+        assert lp['epsg'] > 0
+        assert lp['geometric_accuracy'] > 0
+        assert lp['thematic_accuracy'] > 0
 
     def do_002a_031(self):
         """Creating metadata request
@@ -204,18 +388,16 @@ class TestsBase:
         """
         self.set_response_type('ip')
 
-        from processors.search import QCProcessorSearch
-
+        image_products = self._manager.config['image_products']
         for ptype in ('primary', 'supplementary'):
             platform = self.get_platform(ptype)
             if not platform:
                 continue
-            processor = QCProcessorSearch(self._manager.config, self._manager.response).\
-                get_processor_sensor(platform, ptype)
+            processor = self.get_search_processor(ptype)
             kwargs = processor.get_query_params()
 
-            assert kwargs['producttype'] == self._manager.config['image_products']\
-                ['{}_processing_level1'.format(ptype)]
+            assert kwargs['producttype'] == \
+                image_products['{}_processing_level1'.format(ptype)]
 
     def do_003_032(self):
         """Selecting quality IP
@@ -225,8 +407,6 @@ class TestsBase:
         """
         self.set_response_type('ip')
 
-        from processors.search import QCProcessorSearch
-
         processor = QCProcessorSearch(
             self._manager.config, self._manager.response
         )
@@ -234,7 +414,7 @@ class TestsBase:
         assert processor.get_response_status() != DbIpOperationStatus.failed
 
         self.check_responses('feasibilityControlMetric', 'value',
-                             self.check_value_type(bool))
+                             self._IS_BOOL)
 
     def do_004a_033a(self):
         """Identifying delivered IP
@@ -244,22 +424,22 @@ class TestsBase:
         """
         self.set_response_type('ip')
 
-        from processors.download import QCProcessorDownload
-
         processor = QCProcessorDownload(
             self._manager.config, self._manager.response
         )
         processor.run()
         assert processor.get_response_status() != DbIpOperationStatus.failed
 
-        # collect files
-        dir_content = os.listdir(os.path.join(
-            self._manager.config['project']['path'],
-            self._manager.config['project']['downpath'])
-        )
+        # collect files (sorted, identifier prefix looked up by bisection)
+        with os.scandir(os.path.join(
+                self._project_path,
+                self._manager.config['project']['downpath'])) as it:
+            dir_content = sorted(entry.name for entry in it)
         for response in self._manager.response:
             identifier = response.content()['properties']['identifier']
-            assert len(list(filter(lambda x: x.startswith(identifier), dir_content))) > 0
+            idx = bisect.bisect_left(dir_content, identifier)
+            assert idx < len(dir_content) and \
+                dir_content[idx].startswith(identifier)
 
     def do_004b_033a(self):
         """Comparing delivery IP with expected
@@ -269,7 +449,7 @@ class TestsBase:
         self.set_response_type('ip')
 
         self.check_responses('deliveryControlMetric', 'value',
-                             self.check_value_type(bool))
+                             self._IS_BOOL)
 
     def do_009_034a(self):
         """Identifying pixel-level metadata
@@ -279,7 +459,6 @@ class TestsBase:
         """
         self.set_response_type('ip')
 
-        from processors.valid_pixels import QCProcessorValidPixels
         processor_vp = QCProcessorValidPixels(
             self._manager.config,
             self._manager.response
@@ -301,9 +480,9 @@ class TestsBase:
         self.set_response_type('ip')
 
         self.check_responses('detailedControlMetric', {'cloudCover' : 'lineage'},
-                             self.check_value_type(str))
+                             self._IS_STR)
         self.check_responses('detailedControlMetric', {'validPixels' : 'lineage'},
-                             self.check_value_type(str))
+                             self._IS_STR)
 
     def do_012_036(self):
         """Creating raster spatial layer
@@ -315,7 +494,6 @@ class TestsBase:
         self.set_response_type('lp')
 
         # run LP initialization before vpx coverage
-        from processors.lp_init import QCProcessorLPInit
         processor = QCProcessorLPInit(
             self._manager.config,
             self._manager.response
@@ -324,18 +502,19 @@ class TestsBase:
         assert processor.get_response_status() != DbIpOperationStatus.failed
 
         # compute vpx coverage
-        from processors.vpx_coverage import QCProcessorVpxCoverage
-        processor = QCProcessorVpxCoverage(
-            self._manager.config,
-            self._manager.response
-        )
+        processor = self.get_processor(QCProcessorVpxCoverage)
         processor.run()
         assert processor.get_response_status() != DbIpOperationStatus.failed
 
         self._num_responses['lp'] += len(self._manager.response)
 
-        for year in processor.get_years():
-            assert os.path.exists(processor.get_output_file(year))
+        # output files kept for subsequent tests
+        self._vpx_output.update(
+            (year, processor.get_output_file(year))
+            for year in processor.get_years()
+        )
+        for vpx_file in self._vpx_output.values():
+            assert os.path.exists(vpx_file)
 
     def do_013a_037a(self):
         """Test if the fitnessForPurpose is specified.
@@ -345,7 +524,7 @@ class TestsBase:
         the LPST.
         """
         self.check_responses('ipForLpInformationMetric', 'fitnessForPurpose',
-                             self.check_value_type(str))
+                             self._IS_STR)
 
     def do_013b_037b(self):
         """Returning spatial coverage statistics
@@ -353,17 +532,15 @@ class TestsBase:
         This test case consists to check that the QC Manager creates spatial
         coverage comparison statistics.
         """
-        from processors.vpx_coverage import QCProcessorVpxCoverage
-        processor = QCProcessorVpxCoverage(
-            self._manager.config,
-            self._manager.response
-        )
         # no need to run processor, already performed by 012 (!)
-
-        for year in processor.get_years():
-            value, count, ncells = processor.compute_value_count(
-                processor.get_output_file(year)
-            )
+        processor = self.get_processor(QCProcessorVpxCoverage)
+
+        vpx_files = list(self._vpx_output.values()) or [
+            processor.get_output_file(year) for year in processor.get_years()
+        ]
+        assert vpx_files, 'No vpx coverage output to be checked'
+        for vpx_file in vpx_files:
+            value, count, ncells = processor.compute_value_count(vpx_file)
             assert max(value) <= len(self._response['ip'])
 
     def do_022b_041b(self):
@@ -376,7 +553,7 @@ class TestsBase:
         self.set_response_type('lp')
 
         self.check_responses('lpMetadataControlMetric', 'metadataCompliancy',
-                             self.check_value_type(bool),
+                             self._IS_BOOL,
                              check_missing_value = False)
 
     def do_024b_042(self):
@@ -404,6 +581,6 @@ class TestsBase:
         self.set_response_type('lp')
 
         self.check_responses('lpThematicValidationMetric', 'value',
-                             self.check_value_type(bool),
+                             self._IS_BOOL,
                              check_missing_value=False)
 
@@ -1,24 +1,32 @@
 import os
+import logging
 import pytest
+import numpy as np
 
 from manager.logger import Logger
 from manager.logger.db import DbIpOperationStatus
 
+from processors.ordinary_control import QCProcessorOrdinaryControl
+from processors.cloud_coverage import QCProcessorCloudCoverage
+from processors.geometry_quality import QCProcessorGeometryQuality
+from processors.lp_interpretation_control import QCProcessorLPInterpretationControl
+from processors.lp_metadata_control import QCProcessorLPMetadataControl
+from processors.lp_ordinary_control import QCProcessorLPOrdinaryControl
+from processors.lp_thematic_validation_control import QCProcessorLPThematicValidationControl
+
 from test_tc import TestsBase, _cleanup, _setup, _teardown
 
+# canonical paths (no '..' segments), also used as config cache keys
+_root_dir = os.path.realpath(os.path.join(os.path.dirname(__file__), '..'))
+
 config_files = [
-    os.path.join(
-        os.path.dirname(__file__), '..', 'config.yaml'),
-    os.path.join(
-        os.path.dirname(__file__), '..', 'use_cases',
-        'tuc1_imd_2018_010m', 'tuc1_imd_2018_010m_prague.yaml'),
-    os.path.join(
-        os.path.dirname(__file__), '..', 'use_cases',
-        'tuc1_imd_2018_010m', 'tuc1_imd_2018_010m_prague_sample.yaml'),
-    os.path.join(
-        os.path.dirname(__file__), '..', 'tests', 'test_tc1.yaml'),
-    os.path.join(
-        os.path.dirname(__file__), '..', 'tests', 'test.yaml')
+    os.path.join(_root_dir, 'config.yaml'),
+    os.path.join(_root_dir, 'use_cases',
+                 'tuc1_imd_2018_010m', 'tuc1_imd_2018_010m_prague.yaml'),
+    os.path.join(_root_dir, 'use_cases',
+                 'tuc1_imd_2018_010m', 'tuc1_imd_2018_010m_prague_sample.yaml'),
+    os.path.join(_root_dir, 'tests', 'test_tc1.yaml'),
+    os.path.join(_root_dir, 'tests', 'test.yaml')
 ]
 
 @pytest.fixture(scope="session", autouse=True)
@@ -31,6 +39,25 @@ def class_manager(request):
     yield
     _teardown(request)
 
+@pytest.fixture(scope='class')
+def ref_image_area(request, class_manager):
+    """Area of reference image (opened only once)."""
+    from osgeo import gdal
+
+    ref_im = gdal.Open(
+        request.cls._manager.config['geometry']['reference_image'],
+        gdal.GA_ReadOnly
+    )
+    # get pixel area from georeference of raster
+    geo = ref_im.GetGeoTransform()
+    pixel_area = abs(geo[1] * geo[5])
+    # get the only band
+    band = ref_im.GetRasterBand(1)
+    area = pixel_area * band.XSize * band.YSize
+    band = ref_im = None
+
+    return area
+
 @pytest.mark.usefixtures('cleanup')
 @pytest.mark.usefixtures('class_manager')
 class TestsTUC1(TestsBase):
@@ -39,10 +66,10 @@ class TestsTUC1(TestsBase):
     Contains tests for TUC1 - both implemented and simple calls of the base
     methods.
     """
-    def check_responses(self, isMeasurementOf, attribute, condition,
-                        check_missing_value=True):
-        super(TestsTUC1, self).check_responses(isMeasurementOf, attribute, condition,
-                                               check_missing_value)
+    def check_responses_multi(self, isMeasurementOf, checks,
+                              check_missing_value=True):
+        super(TestsTUC1, self).check_responses_multi(isMeasurementOf, checks,
+                                                     check_missing_value)
         # check consistency
         response_type = self._response['current']
         assert self._num_responses[response_type] > 0
@@ -77,32 +104,27 @@ class TestsTUC1(TestsBase):
         """
         self.set_response_type('ip')
 
-        from processors.search import QCProcessorSearch
-
         for ptype in ('primary', 'supplementary'):
             platform = self.get_platform(ptype)
             if not platform:
                 continue
-            processor = QCProcessorSearch(self._manager.config, self._manager.response).\
-                get_processor_sensor(
-                    self._manager.config['image_products']['{}_platform'.format(ptype)],
-                    ptype
-                )
-            processor.connector = processor.connect()
+            processor = self.get_search_processor(ptype, connect=True)
             products = processor.query(
                 processor.get_query_params()
             )
             self._num_responses['ip'] += len(products)
 
-            for uuid in products:
-                Logger.info("Querying {}".format(uuid))
-                assert products[uuid]['producttype'] == \
-                    self._manager.config['image_products']['{}_processing_level1'.format(
-                        ptype)
-                    ]
-                date = products[uuid]['beginposition'].date()
-                assert date > self._manager.config['image_products']['datefrom'] and \
-                    date < self._manager.config['image_products']['dateto']
+            if not products:
+                continue
+            if Logger.isEnabledFor(logging.INFO):
+                Logger.info("Querying {}".format(', '.join(map(str, products))))
+            image_products = self._manager.config['image_products']
+            values = products.values()
+            assert {v['producttype'] for v in values} == \
+                {image_products['{}_processing_level1'.format(ptype)]}
+            dates = [v['beginposition'].date() for v in values]
+            assert min(dates) > image_products['datefrom'] and \
+                max(dates) < image_products['dateto']
 
         Logger.info("Getting metadata based on request")
 
@@ -143,8 +165,6 @@ class TestsTUC1(TestsBase):
         """
         self.set_response_type('ip')
 
-        from processors.ordinary_control import QCProcessorOrdinaryControl
-
         processor = QCProcessorOrdinaryControl(
             self._manager.config, self._manager.response
         )
@@ -152,7 +172,7 @@ class TestsTUC1(TestsBase):
         assert processor.get_response_status() != DbIpOperationStatus.failed
 
         self.check_responses('ordinaryControlMetric', {'level1': 'rastersComplete'},
-                             self.check_value_type(bool))
+                             self._IS_BOOL)
         Logger.info("Identifying IP raster layers")
 
     def test_tc_006a(self):
@@ -164,7 +184,7 @@ class TestsTUC1(TestsBase):
         self.set_response_type('ip')
 
         self.check_responses('ordinaryControlMetric', {'level1': 'metadataRead'},
-                             self.check_value_type(bool))
+                             self._IS_BOOL)
         Logger.info("Identifying IP metadata")
 
     def test_tc_006b(self):
@@ -176,7 +196,7 @@ class TestsTUC1(TestsBase):
         self.set_response_type('ip')
 
         self.check_responses('ordinaryControlMetric', {'level1': 'calibrationMetadata'},
-                             self.check_value_type(bool))
+                             self._IS_BOOL)
         Logger.info("Comparing metadata with template")
 
     def test_tc_007a(self):
@@ -187,19 +207,20 @@ class TestsTUC1(TestsBase):
         """
         self.set_response_type('ip')
 
+        # channels, rows, cols and bits of the first band, one row per IP
+        values = []
         for response in self._manager.response:
             ordinary_control_level1 = response.get(
                 'ordinaryControlMetric'
             )['level1']
-
-            assert ordinary_control_level1['channels'] > 0
             band = ordinary_control_level1['bands'][0]
-            assert band['rows'] > 0
-            assert band['cols'] > 0
-            assert band['bits'] > 0
+            values.append((ordinary_control_level1['channels'],
+                           band['rows'], band['cols'], band['bits']))
+
+        assert (np.array(values, dtype=np.int64) > 0).all()
         Logger.info("Reading raster layer characteristics")
 
-    def test_tc_007b(self):
+    def test_tc_007b(self, ref_image_area):
         """Compare reported raster layer characteristics with real values.
 
         This test case consists to check that the QC Manager compares
@@ -208,35 +229,24 @@ class TestsTUC1(TestsBase):
         """
         self.set_response_type('ip')
 
-        from osgeo import gdal
-
-        ref_im_path = self._manager.config['geometry']['reference_image']
-
-        ref_im = gdal.Open(ref_im_path, gdal.GA_ReadOnly)
-        # get pixel area from georeference of raster
-        geo = ref_im.GetGeoTransform()
-        pixel_area = abs(geo[1] * geo[5])
-        # get the only band
-        band = ref_im.GetRasterBand(1)
-
-        area_ref = pixel_area * band.XSize * band.YSize
+        area_ref = ref_image_area
         area_band = None
 
         lp = self._manager.config['land_product']
-        ref_im_resolution = lp['geometric_resolution']
+        target_id = 'B03_{}m'.format(lp['geometric_resolution'])
 
         for response in self._manager.response:
-            try:
-                level2_bands = response.get(
-                    'ordinaryControlMetric'
-                )['level2']['bands']
-            except KeyError:
+            ordinary_control = response.get('ordinaryControlMetric') or {}
+            level2_bands = ordinary_control.get('level2', {}).get('bands')
+            if level2_bands is None:
                 Logger.warning("IP: {} level2 not found, test007b skipped".format(
                     response.content()['properties']['identifier']
                 ))
+                continue
 
+            # stop at the first matching band, every IP is checked
             for i in level2_bands:
-                if i['id'] == 'B03_{}m'.format(ref_im_resolution):
+                if i['id'] == target_id:
                     rows = int(i['rows'])
                     cols = int(i['cols'])
                     res = int(i['resolution'])
@@ -259,12 +269,11 @@ class TestsTUC1(TestsBase):
         """
         self.set_response_type('ip')
 
-        self.check_responses('ordinaryControlMetric', 'lineage',
-                             self.check_value_type(str))
-        self.check_responses('ordinaryControlMetric', {'level1': 'lineage'},
-                             self.check_value_type(str))
-        self.check_responses('ordinaryControlMetric', {'level2': 'lineage'},
-                             self.check_value_type(str))
+        self.check_responses_multi('ordinaryControlMetric', [
+            ('lineage', self._IS_STR),
+            ({'level1': 'lineage'}, self._IS_STR),
+            ({'level2': 'lineage'}, self._IS_STR),
+        ])
         Logger.info("Identifying IP lineage")
 
     def test_tc_009(self):
@@ -273,16 +282,12 @@ class TestsTUC1(TestsBase):
         This test case consists to check that the QC Manager identifies IP
         pixel-level metadata.
         """
-        from processors.cloud_coverage import QCProcessorCloudCoverage
-
         processor_cc = QCProcessorCloudCoverage(
             self._manager.config, self._manager.response
         )
         processor_cc.run()
         assert processor_cc.get_response_status() != DbIpOperationStatus.failed
 
-        from processors.geometry_quality import QCProcessorGeometryQuality
-
         processor_gq = QCProcessorGeometryQuality(
             self._manager.config, self._manager.response
         )
@@ -298,24 +303,14 @@ class TestsTUC1(TestsBase):
         This test case consists to check that the QC Manager can read
         the detailed metadata.
         """
-        self.check_responses('detailedControlMetric',
-                             ('geometry', 0, 'rmseX'),
-                             self.check_value_type(float))
-        self.check_responses('detailedControlMetric',
-                             ('geometry', 0, 'rmseY'),
-                             self.check_value_type(float))
-        self.check_responses('detailedControlMetric',
-                             ('geometry', 0, 'diffXmax'),
-                             self.check_value_type(float))
-        self.check_responses('detailedControlMetric',
-                             ('geometry', 0, 'diffYmax'),
-                             self.check_value_type(float))
-        self.check_responses('detailedControlMetric',
-                             ('geometry', 0, 'medianAbsShift'),
-                             self.check_value_type(float))
-        self.check_responses('detailedControlMetric',
-                             ('geometry', 0, 'validGCPs'),
-                             self.check_value_type(int))
+        self.check_responses_multi('detailedControlMetric', [
+            (('geometry', 0, 'rmseX'), self._IS_FLOAT),
+            (('geometry', 0, 'rmseY'), self._IS_FLOAT),
+            (('geometry', 0, 'diffXmax'), self._IS_FLOAT),
+            (('geometry', 0, 'diffYmax'), self._IS_FLOAT),
+            (('geometry', 0, 'medianAbsShift'), self._IS_FLOAT),
+            (('geometry', 0, 'validGCPs'), self._IS_INT),
+        ])
 
         Logger.info("Reading detailed metadata")
 
@@ -327,7 +322,7 @@ class TestsTUC1(TestsBase):
         """
         self.check_responses('detailedControlMetric',
                              ('geometry', 0, 'requirement'),
-                             self.check_value_type(bool))
+                             self._IS_BOOL)
 
         Logger.info("Comparing pixel metadata with specification table")
 
@@ -376,7 +371,6 @@ class TestsTUC1(TestsBase):
         Product quality indicators (only UC1).
         """
         self.set_response_type('lp')
-        from processors.lp_interpretation_control import QCProcessorLPInterpretationControl
         processor = QCProcessorLPInterpretationControl(
             self._manager.config,
             self._manager.response
@@ -385,7 +379,7 @@ class TestsTUC1(TestsBase):
         assert processor.get_response_status() != DbIpOperationStatus.failed
 
         self.check_responses('lpInterpretationMetric', 'value',
-                             self.check_value_type(bool),
+                             self._IS_BOOL,
                              check_missing_value=False)
 
         Logger.info("Identifying Land Product QI" )
@@ -415,7 +409,6 @@ class TestsTUC1(TestsBase):
         Land Product associated metadata.
         """
         self.set_response_type('lp')
-        from processors.lp_metadata_control import QCProcessorLPMetadataControl
         processor = QCProcessorLPMetadataControl(
             self._manager.config,
             self._manager.response
@@ -424,7 +417,7 @@ class TestsTUC1(TestsBase):
         assert processor.get_response_status() != DbIpOperationStatus.failed
 
         self.check_responses('lpMetadataControlMetric', 'value',
-                             self.check_value_type(bool),
+                             self._IS_BOOL,
                              check_missing_value=False)
 
         Logger.info("Identifying LP metadata")
@@ -447,7 +440,6 @@ class TestsTUC1(TestsBase):
         the resulting Land Product technical characteristics.
         """
         self.set_response_type('lp')
-        from processors.lp_ordinary_control import QCProcessorLPOrdinaryControl
         processor = QCProcessorLPOrdinaryControl(
             self._manager.config,
             self._manager.response
@@ -456,7 +448,7 @@ class TestsTUC1(TestsBase):
         assert processor.get_response_status() != DbIpOperationStatus.failed
 
         self.check_responses('lpOrdinaryControlMetric', 'read',
-                             self.check_value_type(bool),
+                             self._IS_BOOL,
                              check_missing_value=False)
 
         Logger.info("Reading Land Product characteristics")
@@ -471,7 +463,7 @@ class TestsTUC1(TestsBase):
         self.set_response_type('lp')
 
         self.check_responses('lpOrdinaryControlMetric', 'value',
-                             self.check_value_type(bool),
+                             self._IS_BOOL,
                              check_missing_value=False)
 
         Logger.info("Comparing LP technical characteristics with definition")
@@ -483,7 +475,6 @@ class TestsTUC1(TestsBase):
         can read reference data set of the land product.
         """
         self.set_response_type('lp')
-        from processors.lp_thematic_validation_control import QCProcessorLPThematicValidationControl
         processor = QCProcessorLPThematicValidationControl(
             self._manager.config,
             self._manager.response
@@ -492,7 +483,7 @@ class TestsTUC1(TestsBase):
         assert processor.get_response_status() != DbIpOperationStatus.failed
 
         self.check_responses('lpThematicValidationMetric', 'value',
-                             self.check_value_type(bool),
+                             self._IS_BOOL,
                              check_missing_value=False)
 
         Logger.info("Reading land reference data set")
@@ -516,15 +507,10 @@ class TestsTUC1(TestsBase):
         self.set_response_type('lp')
 
         # use case 1: classification overall accuracy and regression RMSE
-        self.check_responses('lpThematicValidationMetric',
-                             {'classification': 'overallAccuracy'},
-                             self.check_value_type(float),
-                             check_missing_value=False)
-
-        self.check_responses('lpThematicValidationMetric',
-                             {'densityCover': 'rmse'},
-                             self.check_value_type(float),
-                             check_missing_value=False)
+        self.check_responses_multi('lpThematicValidationMetric', [
+            ({'classification': 'overallAccuracy'}, self._IS_FLOAT),
+            ({'densityCover': 'rmse'}, self._IS_FLOAT),
+        ], check_missing_value=False)
 
         Logger.info("Creating thematic validation QI")
 
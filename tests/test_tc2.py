@@ -6,21 +6,28 @@ import pytest
 from manager.logger import Logger
 from manager.logger.db import DbIpOperationStatus
 
+from processors.l2_calibration import QCProcessorL2Calibration
+from processors.ordinary_control import QCProcessorOrdinaryControl
+from processors.harmonization_stack import QCProcessorHarmonizationStack
+from processors.cloud_coverage import QCProcessorCloudCoverage
+from processors.geometry_quality import QCProcessorGeometryQuality
+from processors.harmonization_control import QCProcessorHarmonizationControl
+from processors.lp_metadata_control import QCProcessorLPMetadataControl
+from processors.lp_thematic_validation_control import QCProcessorLPThematicValidationControl
+
 from test_tc import TestsBase, _cleanup, _setup, _teardown
 
+# canonical paths (no '..' segments), also used as config cache keys
+_root_dir = os.path.realpath(os.path.join(os.path.dirname(__file__), '..'))
+
 config_files = [
-    os.path.join(
-        os.path.dirname(__file__), '..', 'config.yaml'),
-    os.path.join(
-        os.path.dirname(__file__), '..', 'use_cases',
-        'tuc2_tccm_1518_020m', 'tuc2_tccm_2015_2018_20m_sumava.yaml'),
-    os.path.join(
-        os.path.dirname(__file__), '..', 'use_cases',
-        'tuc2_tccm_1518_020m', 'tuc2_tccm_2015_2018_20m_sumava_sample.yaml'),
-    os.path.join(
-        os.path.dirname(__file__), '..', 'tests', 'test_tc2.yaml'),
-    os.path.join(
-        os.path.dirname(__file__), '..', 'tests', 'test.yaml')
+    os.path.join(_root_dir, 'config.yaml'),
+    os.path.join(_root_dir, 'use_cases',
+                 'tuc2_tccm_1518_020m', 'tuc2_tccm_2015_2018_20m_sumava.yaml'),
+    os.path.join(_root_dir, 'use_cases',
+                 'tuc2_tccm_1518_020m', 'tuc2_tccm_2015_2018_20m_sumava_sample.yaml'),
+    os.path.join(_root_dir, 'tests', 'test_tc2.yaml'),
+    os.path.join(_root_dir, 'tests', 'test.yaml')
 ]
 
 
@@ -36,6 +43,30 @@ def class_manager(request):
     _teardown(request)
 
 
+@pytest.fixture(scope='class')
+def ref_image_meta(request, class_manager):
+    """Attributes of reference image (opened only once)."""
+    from osgeo import gdal
+
+    ref_im = gdal.Open(
+        request.cls._manager.config['geometry']['reference_image'],
+        gdal.GA_ReadOnly
+    )
+    # get resolution from georeference of raster
+    geo = ref_im.GetGeoTransform()
+    # get the only band
+    band = ref_im.GetRasterBand(1)
+    meta = {
+        'rows': band.YSize,
+        'cols': band.XSize,
+        'bits': 16 if band.DataType == 2 else 8,
+        'resolution': abs(geo[1])
+    }
+    band = ref_im = None
+
+    return meta
+
+
 @pytest.mark.usefixtures('cleanup')
 @pytest.mark.usefixtures('class_manager')
 class TestsTUC2(TestsBase):
@@ -87,7 +118,7 @@ class TestsTUC2(TestsBase):
 
         Logger.info("Checking completeness of the multi-sensor IP")
 
-    def test_tc_033b(self):
+    def test_tc_033b(self, ref_image_meta):
         """Check consistency of the multi-sensor IP.
 
         This test case consists to check that the QC Manager checks
@@ -95,11 +126,6 @@ class TestsTUC2(TestsBase):
         """
         self.set_response_type('ip')
 
-        from processors.l2_calibration import QCProcessorL2Calibration
-        from processors.ordinary_control import QCProcessorOrdinaryControl
-        from processors.harmonization_stack import QCProcessorHarmonizationStack
-        from osgeo import gdal
-
         # run l2_calibration
         processor = QCProcessorL2Calibration(
             self._manager.config, self._manager.response
@@ -122,62 +148,27 @@ class TestsTUC2(TestsBase):
         )
         processor.run()
 
-        # get attributes of the reference image
-        ref_im_path = self._manager.config['geometry']['reference_image']
-
-        ref_im = gdal.Open(ref_im_path, gdal.GA_ReadOnly)
-        # get pixel area from georeference of raster
-        geo = ref_im.GetGeoTransform()
-        # get the only band
-        band = ref_im.GetRasterBand(1)
-
-        rows = band.YSize
-        cols = band.XSize
-        dtype = band.DataType
-        bits = 16 if dtype == 2 else 8
-        res = abs(geo[1])
-
-        self.check_responses(
-            'ordinaryControlMetric',
-            ({'harmonized': 'tile'}, 0, {'raster': 'rows'}),
-            self.check_value_one(rows)
-        )
-        self.check_responses(
-            'ordinaryControlMetric',
-            ({'harmonized': 'tile'}, 0, {'raster': 'cols'}),
-            self.check_value_one(cols)
-        )
-        self.check_responses(
-            'ordinaryControlMetric',
-            ({'harmonized': 'tile'}, 0, {'raster': 'bits'}),
-            self.check_value_one(bits)
-        )
-        self.check_responses(
-            'ordinaryControlMetric',
-            ({'harmonized': 'tile'}, 0, {'raster': 'resolution'}),
-            self.check_value_one(res)
-        )
+        # compare with attributes of the reference image
+        self.check_responses_multi('ordinaryControlMetric', [
+            (({'harmonized': 'tile'}, 0, {'raster': field}),
+             self.check_value_one(ref_image_meta[field]))
+            for field in ('rows', 'cols', 'bits', 'resolution')
+        ])
 
         Logger.info("Checking consistency of the multi-sensor IP")
 
-        ref_im = None
-
     def test_tc_034a(self):
         """Check availability of pixel-level multi-sensor metadata.
 
         This test case consists to check that the QC Manager checks
         availability of pixel level multi-sensor metadata.
         """
-        from processors.cloud_coverage import QCProcessorCloudCoverage
-
         processor_cc = QCProcessorCloudCoverage(
             self._manager.config, self._manager.response
         )
         processor_cc.run()
         assert processor_cc.get_response_status() != DbIpOperationStatus.failed
 
-        from processors.geometry_quality import QCProcessorGeometryQuality
-
         processor_cc = QCProcessorGeometryQuality(
             self._manager.config, self._manager.response
         )
@@ -185,8 +176,6 @@ class TestsTUC2(TestsBase):
         assert processor_cc.get_response_status() != DbIpOperationStatus.failed
 
         # run harmonization control
-        from processors.harmonization_control import QCProcessorHarmonizationControl
-
         processor = QCProcessorHarmonizationControl(
             self._manager.config, self._manager.response
         )
@@ -211,16 +200,13 @@ class TestsTUC2(TestsBase):
         This test case consists to check that the QC Manager checks
         consistency of multi-sensor time-series pixel-level IP metadata
         """
-        def get_pixel_values(sec):
-            values = []
-            for item in self._manager.config['pixel_metadata_coding'][rc]:
-                values.append(item['min'])
-            return values
-
-        for rc, sec in (('cloud_coverage', 'cloudCover'),
-                        ('valid_pixels', 'validPixels')):
-            self.check_responses('detailedControlMetric', {sec: 'mask'},
-                                 self.check_pixel_coding(get_pixel_values(rc)))
+        coding = self._manager.config['pixel_metadata_coding']
+        self.check_responses_multi('detailedControlMetric', [
+            ({sec: 'mask'},
+             self.check_pixel_coding([item['min'] for item in coding[rc]]))
+            for rc, sec in (('cloud_coverage', 'cloudCover'),
+                            ('valid_pixels', 'validPixels'))
+        ])
         Logger.info("Checking consistency of multi-sensor time-series "
                     "pixel-level IP metadata")
 
@@ -260,7 +246,7 @@ class TestsTUC2(TestsBase):
         """
         self.set_response_type('ip', copy_responses=True)
         self.check_responses('harmonizationControlMetric', 'value',
-                             self.check_value_type(bool))
+                             self._IS_BOOL)
         Logger.info("Identifying cross-sensor IP metric")
 
     def test_tc_038b(self):
@@ -271,7 +257,7 @@ class TestsTUC2(TestsBase):
         """
         self.check_responses('harmonizationControlMetric',
                              ('geometryConsistency', 0, 'value'),
-                             self.check_value_type(bool))
+                             self._IS_BOOL)
         Logger.info("Creating cross-sensor comparison indicators")
 
     def test_tc_039(self):
@@ -296,7 +282,6 @@ class TestsTUC2(TestsBase):
         """
         self.set_response_type('lp', copy_responses=True)
 
-        from processors.lp_metadata_control import QCProcessorLPMetadataControl
         processor = QCProcessorLPMetadataControl(
             self._manager.config,
             self._manager.response
@@ -305,7 +290,7 @@ class TestsTUC2(TestsBase):
         assert processor.get_response_status() != DbIpOperationStatus.failed
 
         self.check_responses('lpMetadataControlMetric', 'metadataAvailable',
-                             self.check_value_type(bool),
+                             self._IS_BOOL,
                              check_missing_value=False)
 
         Logger.info("Checking availability of the time-series LP metadata")
@@ -327,7 +312,6 @@ class TestsTUC2(TestsBase):
         time-series LP validation indicators.
         """
         self.set_response_type('lp')
-        from processors.lp_thematic_validation_control import QCProcessorLPThematicValidationControl
         processor = QCProcessorLPThematicValidationControl(
             self._manager.config,
             self._manager.response